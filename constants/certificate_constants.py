@@ -0,0 +1,34 @@
+from enum import Enum
+
+
+class CertificateKeyLayoutType(str, Enum):
+    LEGACY = 'legacy'
+    REGISTRATION = 'registration'
+
+
+class CertificateConstants:
+    # Render Settings
+    ZOOM = 4
+    PAGE_CSS = '@page { size: A4 landscape; margin: 0;}'
+    HTML_FILENAME = 'certificate.html'
+    TEMPLATE_IMG_FILENAME = 'template_img.png'
+    NAME_FONT_SIZE = 48
+    NAME_MIN_FONT_SIZE = 20
+    NAME_MAX_WIDTH_RATIO = 0.85
+    NAME_FONT = 'DejaVuSans-Bold.ttf'  # Shipped in template/fonts
+    NAME_FALLBACK_ADVANCE_EM = 0.7  # Average advance of bold sans-serif glyphs
+    PAGE_WIDTH_PX = 297 / 25.4 * 96  # A4 landscape width in CSS pixels
+    PAGE_ASPECT_RATIO = 210 / 297
+
+    # Render Cache
+    RENDER_DIGEST_METADATA_KEY = 'render-digest'
+
+    # Object Keys
+    CERTIFICATES_PREFIX = 'certificates'
+    PREVIEWS_DIR = 'previews'
+
+    # Contact Sheets
+    CONTACT_SHEET_COLUMNS = 6
+    CONTACT_SHEET_ROWS = 8
+    CONTACT_SHEET_CELL_WIDTH = 320
+    CONTACT_SHEET_GUTTER = 4
@@ -13,6 +13,9 @@ class EntryStatus(str, Enum):
 
 class CommonConstants:
     # DB Constants
+    # Throttled calls are retried by the rate controllers, which have to see every throttle to slow down
+    DB_MAX_RETRY_ATTEMPTS = 0
+
     CLS = 'cls'
     HASH_KEY = 'hashKey'
     RANGE_KEY = 'rangeKey'
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class QueueLane(str, Enum):
+    CLAIM = 'claim'
+    BULK = 'bulk'
@@ -1,22 +1,157 @@
 import json
 import os
+import time
+from http import HTTPStatus
 
-import boto3
-
+from constants.queue_constants import QueueLane
+from model.common import Message
 from usecase.certificate_usecase import CertificateUsecase
-from utils.logger import logger
+from utils.logger import flush_logs, log_summary, logger
+from utils.rate_controller import emit_rate_metrics
 
-CERTIFICATE_QUEUE = os.getenv('CERTIFICATE_QUEUE')
-SQS = boto3.client('sqs')
+CERTIFICATE_CLAIM_QUEUE = os.getenv('CERTIFICATE_CLAIM_QUEUE')
+LANE_TIME_BUDGET_SECONDS = {
+    QueueLane.CLAIM: float(os.getenv('CLAIM_LANE_TIME_BUDGET_SECONDS', '60')),
+    QueueLane.BULK: float(os.getenv('BULK_LANE_TIME_BUDGET_SECONDS', '840')),
+}
+TIME_BUDGET_RESERVE_SECONDS = 30
 
 
 def generate_certificate_handler(event, context):
+    lane = get_lane(event['Records'])
+    time_budget = LANE_TIME_BUDGET_SECONDS[lane]
+    if context:
+        time_budget = min(time_budget, context.get_remaining_time_in_millis() / 1000 - TIME_BUDGET_RESERVE_SECONDS)
+    deadline = time.monotonic() + time_budget
+    logger.info('Processing %s %s messages with a %.0fs time budget', len(event['Records']), lane.value, time_budget)
+
+    certificate_usecase = CertificateUsecase()
+    message_groups = get_message_groups(event['Records'])
+    failed_request_ids = []
+    failed_groups = set()
+    for event_id, requests in coalesce_records(event['Records']).items():
+        # An event-wide job in the same batch already covers every single registration of that event
+        if None in requests:
+            requests = {None: requests[None]}
+
+        # Warm containers serve every lookup after the first from the event cache
+        for registration_id, request_id in requests.items():
+            # FIFO ordering: once a message is left for retry, every later message of its group is retried too
+            group_id = message_groups.get(request_id)
+            if group_id in failed_groups or time.monotonic() >= deadline:
+                failed_request_ids.append(request_id)
+                failed_groups.add(group_id)
+                continue
+
+            is_handled = certificate_usecase.generate_certficates(
+                event_id=event_id, registration_id=registration_id, request_id=request_id, deadline=deadline
+            )
+            if not is_handled:
+                failed_request_ids.append(request_id)
+                failed_groups.add(group_id)
+
+    log_summary.emit()
+    emit_rate_metrics()
+    flush_logs()
+
+    # Messages not reported here are deleted by the event source mapping
+    return {'batchItemFailures': [{'itemIdentifier': request_id} for request_id in failed_request_ids]}
+
+
+def get_lane(records: list) -> QueueLane:
+    """Get the priority lane of a batch from the queue its records came from."""
+    queue_name = records[0]['eventSourceARN'].rsplit(':', 1)[-1] if records else None
+    return QueueLane.CLAIM if queue_name and queue_name == CERTIFICATE_CLAIM_QUEUE else QueueLane.BULK
+
+
+def get_message_groups(records: list) -> dict:
+    """Map each SQS message ID to its FIFO message group ID, or None for records without one."""
+    return {record['messageId']: record.get('attributes', {}).get('MessageGroupId') for record in records}
+
+
+def get_certificate_handler(event, context):
+    """Return pre-signed URLs of one certificate, rendering it inline when it does not exist yet."""
+    _ = context
+    params = event.get('pathParameters') or event
+    event_id = params.get('eventId')
+    registration_id = params.get('registrationId')
+    if not event_id or not registration_id:
+        return http_response(HTTPStatus.BAD_REQUEST, Message(message='eventId and registrationId are required'))
+
+    certificate_usecase = CertificateUsecase()
+    status, certificate, message = certificate_usecase.get_certificate(
+        event_id=event_id, registration_id=registration_id
+    )
+    log_summary.emit()
+    emit_rate_metrics()
+    flush_logs()
+    if status != HTTPStatus.OK:
+        return http_response(status, Message(message=message))
+
+    return http_response(status, certificate)
+
+
+def get_certificates_handler(event, context):
+    """Return pre-signed URLs of every generated certificate of an event."""
     _ = context
+    params = event.get('pathParameters') or event
+    event_id = params.get('eventId')
+    if not event_id:
+        return http_response(HTTPStatus.BAD_REQUEST, Message(message='eventId is required'))
+
+    certificate_usecase = CertificateUsecase()
+    status, certificates, message = certificate_usecase.get_certificates(event_id=event_id)
+    log_summary.emit()
+    emit_rate_metrics()
+    flush_logs()
+    if status != HTTPStatus.OK:
+        return http_response(status, Message(message=message))
+
+    return http_list_response(status, certificates)
+
+
+def get_generation_jobs_handler(event, context):
+    """Return the progress of an event's certificate generation jobs."""
+    _ = context
+    params = event.get('pathParameters') or event
+    event_id = params.get('eventId')
+    if not event_id:
+        return http_response(HTTPStatus.BAD_REQUEST, Message(message='eventId is required'))
+
     certificate_usecase = CertificateUsecase()
-    for record in event['Records']:
-        logger.info(record)
+    status, jobs, message = certificate_usecase.get_generation_jobs(event_id=event_id)
+    log_summary.emit()
+    emit_rate_metrics()
+    flush_logs()
+    if status != HTTPStatus.OK:
+        return http_response(status, Message(message=message))
+
+    return http_list_response(status, jobs)
+
+
+def http_response(status: HTTPStatus, body) -> dict:
+    return {
+        'statusCode': status.value,
+        'headers': {'Content-Type': 'application/json'},
+        'body': body.json(),
+    }
+
+
+def http_list_response(status: HTTPStatus, items: list) -> dict:
+    return {
+        'statusCode': status.value,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps([json.loads(item.json()) for item in items]),
+    }
+
+
+def coalesce_records(records: list) -> dict:
+    """Group SQS records by event ID, mapping each distinct registration ID to the first message requesting it."""
+    jobs = {}
+    for record in records:
+        logger.debug('Received message: %s', record['messageId'])
         message_body = json.loads(record['body'])
-        event_id = message_body['eventId']
-        registration_id = message_body['registrationId']
-        certificate_usecase.generate_certficates(event_id=event_id, registration_id=registration_id)
-        SQS.delete_message(QueueUrl=CERTIFICATE_QUEUE, ReceiptHandle=record['receiptHandle'])
+        requests = jobs.setdefault(message_body['eventId'], {})
+        requests.setdefault(message_body['registrationId'], record['messageId'])
+
+    return jobs
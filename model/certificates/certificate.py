@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Extra, Field
+
+
+class CertificateOut(BaseModel):
+    class Config:
+        extra = Extra.ignore
+
+    eventId: str = Field(..., title="Event ID")
+    registrationId: str = Field(..., title="Registration ID")
+    certificatePdfObjectKey: str = Field(None, title="Certificate PDF Object Key")
+    certificateImgObjectKey: str = Field(None, title="Certificate Image Object Key")
+    certificatePdfUrl: str = Field(None, title="Certificate PDF Pre-signed URL")
+    certificateImgUrl: str = Field(None, title="Certificate Image Pre-signed URL")
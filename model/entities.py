@@ -7,12 +7,15 @@ from pynamodb.attributes import (
 )
 from pynamodb.models import Model
 
+from constants.common_constants import CommonConstants
+
 
 class Entities(Model):
     class Meta:
         table_name = os.getenv('ENTITIES_TABLE')
         region = os.getenv('REGION')
         billing_mode = 'PAY_PER_REQUEST'
+        max_retry_attempts = CommonConstants.DB_MAX_RETRY_ATTEMPTS
 
     cls = DiscriminatorAttribute()
 
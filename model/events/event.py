@@ -2,6 +2,7 @@ import os
 from datetime import datetime
 from typing import Optional
 
+from constants.common_constants import CommonConstants
 from model.events.events_constants import EventStatus
 from pydantic import BaseModel, EmailStr, Extra, Field
 from pynamodb.attributes import BooleanAttribute, NumberAttribute, UnicodeAttribute
@@ -27,6 +28,7 @@ class Event(Model):
         table_name = os.getenv('EVENTS_TABLE')
         region = os.getenv('REGION')
         billing_mode = 'PAY_PER_REQUEST'
+        max_retry_attempts = CommonConstants.DB_MAX_RETRY_ATTEMPTS
 
     hashKey = UnicodeAttribute(hash_key=True)
     rangeKey = UnicodeAttribute(range_key=True)
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Extra, Field
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute
+
+from model.entities import Entities
+from model.generation_jobs.generation_jobs_constants import GenerationJobStatus
+
+
+class GenerationJob(Entities, discriminator='GenerationJob'):
+    # hk: GenerationJob#<eventId>
+    # rk: <registrationId> or ALL for event-wide jobs
+    eventId = UnicodeAttribute(null=False)
+    registrationId = UnicodeAttribute(null=True)
+    requestId = UnicodeAttribute(null=True)
+
+    jobStatus = UnicodeAttribute(null=False)
+    leaseExpiresAt = NumberAttribute(null=False)
+    startDate = UnicodeAttribute(null=True)
+    endDate = UnicodeAttribute(null=True)
+
+    totalCount = NumberAttribute(null=True)
+    renderedCount = NumberAttribute(default=0)
+    failedCount = NumberAttribute(default=0)
+    skippedCount = NumberAttribute(default=0)
+
+
+class GenerationJobOut(BaseModel):
+    class Config:
+        extra = Extra.ignore
+
+    jobId: str = Field(..., title="Job ID")
+    eventId: str = Field(..., title="Event ID")
+    registrationId: str = Field(None, title="Registration ID")
+    jobStatus: GenerationJobStatus = Field(..., title="Job Status")
+    startDate: datetime = Field(None, title="Started At")
+    endDate: datetime = Field(None, title="Ended At")
+    totalCount: int = Field(None, title="Total Certificates")
+    renderedCount: int = Field(0, title="Rendered Certificates")
+    failedCount: int = Field(0, title="Failed Certificates")
+    skippedCount: int = Field(0, title="Skipped Certificates")
+    throughput: float = Field(None, title="Certificates per Second")
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class GenerationJobStatus(str, Enum):
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    INTERRUPTED = 'interrupted'
+
+
+class GenerationJobConstants:
+    HASH_KEY_PREFIX = 'GenerationJob'
+    EVENT_SCOPE = 'ALL'
@@ -6,6 +6,8 @@ from pynamodb.attributes import BooleanAttribute, NumberAttribute, UnicodeAttrib
 from pynamodb.indexes import AllProjection, GlobalSecondaryIndex, LocalSecondaryIndex
 from pynamodb.models import Model
 
+from constants.common_constants import CommonConstants
+
 
 class RegistrationGlobalSecondaryIndex(GlobalSecondaryIndex):
     class Meta:
@@ -33,6 +35,7 @@ class Registration(Model):
         table_name = os.getenv('REGISTRATIONS_TABLE')
         region = os.getenv('REGION')
         billing_mode = 'PAY_PER_REQUEST'
+        max_retry_attempts = CommonConstants.DB_MAX_RETRY_ATTEMPTS
 
     hashKey = UnicodeAttribute(hash_key=True)
     rangeKey = UnicodeAttribute(range_key=True)
@@ -4,7 +4,7 @@ from datetime import datetime
 from http import HTTPStatus
 from typing import List, Tuple
 
-from constants.common_constants import EntryStatus
+from constants.common_constants import CommonConstants, EntryStatus
 from model.events.event import Event
 from pynamodb.connection import Connection
 from pynamodb.exceptions import (
@@ -12,6 +12,15 @@ from pynamodb.exceptions import (
     QueryError,
     TableDoesNotExist,
 )
+from utils.rate_controller import get_rate_controller
+from utils.ttl_cache import TTLCache
+
+# Per-container cache of single event lookups keyed by (latest_version, event_id)
+EVENT_CACHE = TTLCache(
+    max_size=int(os.getenv('EVENT_CACHE_MAX_SIZE', '128')),
+    ttl=float(os.getenv('EVENT_CACHE_TTL_SECONDS', '300')),
+)
+DYNAMODB_RATE_CONTROLLER = get_rate_controller('dynamodb')
 
 
 class EventsRepository:
@@ -19,16 +28,42 @@ class EventsRepository:
         self.core_obj = 'Event'
         self.current_date = datetime.utcnow().isoformat()
         self.latest_version = 0
-        self.conn = Connection(region=os.getenv('REGION'))
+        self.conn = Connection(region=os.getenv('REGION'), max_retry_attempts=CommonConstants.DB_MAX_RETRY_ATTEMPTS)
+
+    def query_events(
+        self, event_id: str = None, use_cache: bool = True, revalidate: bool = False
+    ) -> Tuple[HTTPStatus, List[Event], str]:
+        """
+        Query active events from the database.
+
+        Single event lookups are served from a per-container TTL cache when possible.
+
+        Args:
+            event_id (str, optional): The event ID to query (default is None to query all events).
+            use_cache (bool, optional): Whether a single event lookup may be served from the cache.
+            revalidate (bool, optional): Whether a cache hit is checked against the stored updateDate with a
+                projected query before it is returned.
+
+        Returns:
+            Tuple[HTTPStatus, List[Event], str]: A tuple containing HTTP status, the event record (or a list of
+            event records when no event ID is given), and an optional error message.
+        """
+        cache_key = (self.latest_version, event_id)
+        if event_id and use_cache:
+            cached_event = EVENT_CACHE.get(cache_key)
+            if cached_event and (not revalidate or self.__is_cached_event_fresh(cached_event)):
+                logging.debug(f'[{self.core_obj}={event_id}] Fetch Event data from cache')
+                return HTTPStatus.OK, cached_event, None
 
-    def query_events(self, event_id: str = None) -> Tuple[HTTPStatus, List[Event], str]:
         try:
             range_key_condition = Event.eventId == event_id if event_id else None
-            event_entries = list(
-                Event.eventIdIndex.query(
-                    hash_key=f'v{self.latest_version}',
-                    range_key_condition=range_key_condition,
-                    filter_condition=Event.entryStatus == EntryStatus.ACTIVE.value,
+            event_entries = DYNAMODB_RATE_CONTROLLER.call(
+                lambda: list(
+                    Event.eventIdIndex.query(
+                        hash_key=f'v{self.latest_version}',
+                        range_key_condition=range_key_condition,
+                        filter_condition=Event.entryStatus == EntryStatus.ACTIVE.value,
+                    )
                 )
             )
             if not event_entries:
@@ -57,7 +92,42 @@ class EventsRepository:
         else:
             if event_id:
                 logging.info(f'[{self.core_obj}={event_id}] Fetch Event data successful')
+                EVENT_CACHE.set(cache_key, event_entries[0])
                 return HTTPStatus.OK, event_entries[0], None
 
             logging.info(f'[{self.core_obj}={event_id}] Fetch Event data successful')
             return HTTPStatus.OK, event_entries, None
+
+    def invalidate_event_cache(self, event_id: str = None) -> None:
+        """
+        Drop cached event records.
+
+        Args:
+            event_id (str, optional): The event ID to invalidate (default is None to clear the whole cache).
+        """
+        if event_id:
+            EVENT_CACHE.pop((self.latest_version, event_id))
+        else:
+            EVENT_CACHE.clear()
+
+    def __is_cached_event_fresh(self, cached_event: Event) -> bool:
+        try:
+            event_entries = DYNAMODB_RATE_CONTROLLER.call(
+                lambda: list(
+                    Event.eventIdIndex.query(
+                        hash_key=f'v{self.latest_version}',
+                        range_key_condition=Event.eventId == cached_event.eventId,
+                        filter_condition=Event.entryStatus == EntryStatus.ACTIVE.value,
+                        attributes_to_get=[Event.eventId.attr_name, Event.updateDate.attr_name],
+                    )
+                )
+            )
+        except (QueryError, TableDoesNotExist, PynamoDBConnectionError) as e:
+            logging.warning(f'[{self.core_obj}={cached_event.eventId}] Failed to revalidate cached event: {str(e)}')
+            return False
+
+        is_fresh = bool(event_entries) and event_entries[0].updateDate == cached_event.updateDate
+        if not is_fresh:
+            self.invalidate_event_cache(event_id=cached_event.eventId)
+
+        return is_fresh
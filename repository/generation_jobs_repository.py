@@ -0,0 +1,231 @@
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from http import HTTPStatus
+from typing import List, Tuple
+
+from pynamodb.connection import Connection
+from pynamodb.exceptions import (
+    DoesNotExist,
+    GetError,
+    PutError,
+    PynamoDBConnectionError,
+    QueryError,
+    TableDoesNotExist,
+    UpdateError,
+)
+
+from constants.common_constants import CommonConstants, EntryStatus
+from model.generation_jobs.generation_job import GenerationJob
+from model.generation_jobs.generation_jobs_constants import (
+    GenerationJobConstants,
+    GenerationJobStatus,
+)
+from utils.rate_controller import get_rate_controller
+
+CONDITIONAL_CHECK_FAILED = 'ConditionalCheckFailedException'
+DYNAMODB_RATE_CONTROLLER = get_rate_controller('dynamodb')
+
+
+class GenerationJobsRepository:
+    """
+    A repository class for the ledger of certificate generation jobs in the entities table.
+
+    Every event-wide or single-registration run owns one item that is claimed with a conditional write, so
+    duplicate runs are rejected before they render anything.
+
+    Attributes:
+        core_obj (str): The core object name for generation job records.
+        current_date (str): The current date and time in ISO format.
+        latest_version (int): The entry version of generation job records.
+        conn (Connection): The PynamoDB connection for database operations.
+    """
+
+    def __init__(self) -> None:
+        self.core_obj = 'GenerationJob'
+        self.current_date = datetime.utcnow().isoformat()
+        self.latest_version = 0
+        self.conn = Connection(region=os.getenv('REGION'), max_retry_attempts=CommonConstants.DB_MAX_RETRY_ATTEMPTS)
+
+    def claim_job(
+        self, event_id: str, registration_id: str = None, request_id: str = None, lease_seconds: int = 600
+    ) -> Tuple[HTTPStatus, GenerationJob, str]:
+        """
+        Claim the generation job of an event or of a single registration.
+
+        The claim succeeds when no job of the same scope is running, or when the running job's lease has expired.
+        A request that already completed the job, e.g. an SQS redelivery, is rejected as well. A rejected claim
+        returns the job that holds the scope, so the caller can tell a duplicate from its own crashed run.
+        The claimed job is owned by its request ID, or by a generated one when no request ID is given, and only
+        its owner may update it.
+
+        Args:
+            event_id (str): The event ID.
+            registration_id (str, optional): The registration ID (default is None for an event-wide job).
+            request_id (str, optional): The ID of the request that started the job, e.g. the SQS message ID.
+            lease_seconds (int, optional): How long the claim is held, unless renewed, before another request may
+                take it over.
+
+        Returns:
+            Tuple[HTTPStatus, GenerationJob, str]: A tuple containing HTTP status, the claimed job record (or the
+            conflicting job record on CONFLICT), and an optional error message.
+        """
+        scope = registration_id or GenerationJobConstants.EVENT_SCOPE
+        job_id = f'{event_id}#{scope}'
+        now = int(time.time())
+        job_entry = GenerationJob(
+            hashKey=f'{GenerationJobConstants.HASH_KEY_PREFIX}#{event_id}',
+            rangeKey=scope,
+            latestVersion=self.latest_version,
+            entryStatus=EntryStatus.ACTIVE.value,
+            entryId=job_id,
+            createDate=self.current_date,
+            updateDate=self.current_date,
+            eventId=event_id,
+            registrationId=registration_id,
+            requestId=request_id or uuid.uuid4().hex,
+            jobStatus=GenerationJobStatus.RUNNING.value,
+            leaseExpiresAt=now + lease_seconds,
+            startDate=self.current_date,
+        )
+
+        condition = (
+            GenerationJob.rangeKey.does_not_exist()
+            | (GenerationJob.jobStatus != GenerationJobStatus.RUNNING.value)
+            | (GenerationJob.leaseExpiresAt < now)
+        )
+        if request_id:
+            condition &= (
+                GenerationJob.requestId.does_not_exist()
+                | (GenerationJob.requestId != request_id)
+                | (GenerationJob.jobStatus != GenerationJobStatus.COMPLETED.value)
+            )
+
+        try:
+            DYNAMODB_RATE_CONTROLLER.call(job_entry.save, condition=condition)
+
+        except PutError as e:
+            if e.cause_response_code == CONDITIONAL_CHECK_FAILED:
+                message = f'Generation job {job_id} is already running or completed'
+                logging.warning(f'[{self.core_obj}={job_id}] {message}')
+                return HTTPStatus.CONFLICT, self.__get_job(job_entry), message
+
+            message = f'Failed to claim generation job: {str(e)}'
+            logging.error(f'[{self.core_obj}={job_id}] {message}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        except (TableDoesNotExist, PynamoDBConnectionError) as db_error:
+            message = f'Error on Table, Please check config(region, table name, etc): {str(db_error)}'
+            logging.error(f'[{self.core_obj}={job_id}] {message}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        logging.info(f'[{self.core_obj}={job_id}] Claim generation job successful')
+        return HTTPStatus.OK, job_entry, None
+
+    def __get_job(self, job_entry: GenerationJob) -> GenerationJob:
+        try:
+            return DYNAMODB_RATE_CONTROLLER.call(GenerationJob.get, job_entry.hashKey, job_entry.rangeKey)
+        except (DoesNotExist, GetError, TableDoesNotExist, PynamoDBConnectionError) as e:
+            logging.warning(f'[{self.core_obj}={job_entry.entryId}] Failed to get conflicting job: {str(e)}')
+            return None
+
+    def update_progress(
+        self,
+        job_entry: GenerationJob,
+        rendered: int = 0,
+        failed: int = 0,
+        skipped: int = 0,
+        total: int = None,
+        job_status: GenerationJobStatus = None,
+        lease_seconds: int = None,
+    ) -> Tuple[HTTPStatus, GenerationJob, str]:
+        """
+        Atomically add to the progress counters of a job and optionally set its total or final status.
+
+        The update only applies while the job is still owned by the request that claimed it, so a run whose lease
+        was taken over cannot add to the counters of the run that took it over.
+
+        Args:
+            job_entry (GenerationJob): The claimed job record.
+            rendered (int, optional): The number of newly rendered certificates.
+            failed (int, optional): The number of newly failed certificates.
+            skipped (int, optional): The number of newly skipped (cached) certificates.
+            total (int, optional): The total number of certificates of the job.
+            job_status (GenerationJobStatus, optional): The final status of the job.
+            lease_seconds (int, optional): Renew the lease to expire this many seconds from now.
+
+        Returns:
+            Tuple[HTTPStatus, GenerationJob, str]: A tuple containing HTTP status (CONFLICT if the job was taken
+            over by another request), the job record, and an optional error message.
+        """
+        actions = [GenerationJob.updateDate.set(datetime.utcnow().isoformat())]
+        if rendered:
+            actions.append(GenerationJob.renderedCount.add(rendered))
+        if failed:
+            actions.append(GenerationJob.failedCount.add(failed))
+        if skipped:
+            actions.append(GenerationJob.skippedCount.add(skipped))
+        if total is not None:
+            actions.append(GenerationJob.totalCount.set(total))
+        if job_status:
+            actions.append(GenerationJob.jobStatus.set(job_status.value))
+            actions.append(GenerationJob.endDate.set(datetime.utcnow().isoformat()))
+        if lease_seconds:
+            actions.append(GenerationJob.leaseExpiresAt.set(int(time.time()) + lease_seconds))
+
+        try:
+            DYNAMODB_RATE_CONTROLLER.call(
+                job_entry.update, actions=actions, condition=GenerationJob.requestId == job_entry.requestId
+            )
+
+        except UpdateError as e:
+            if e.cause_response_code == CONDITIONAL_CHECK_FAILED:
+                message = f'Generation job {job_entry.entryId} was taken over by another request'
+                logging.warning(f'[{self.core_obj}={job_entry.entryId}] {message}')
+                return HTTPStatus.CONFLICT, None, message
+
+            message = f'Failed to update generation job: {str(e)}'
+            logging.error(f'[{self.core_obj}={job_entry.entryId}] {message}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        return HTTPStatus.OK, job_entry, None
+
+    def query_jobs(self, event_id: str) -> Tuple[HTTPStatus, List[GenerationJob], str]:
+        """
+        Query the generation jobs of an event.
+
+        Args:
+            event_id (str): The event ID.
+
+        Returns:
+            Tuple[HTTPStatus, List[GenerationJob], str]: A tuple containing HTTP status, a list of job records,
+            and an optional error message.
+        """
+        try:
+            job_entries = DYNAMODB_RATE_CONTROLLER.call(
+                lambda: list(
+                    GenerationJob.query(
+                        hash_key=f'{GenerationJobConstants.HASH_KEY_PREFIX}#{event_id}',
+                        filter_condition=GenerationJob.entryStatus == EntryStatus.ACTIVE.value,
+                    )
+                )
+            )
+            if not job_entries:
+                message = f'No generation jobs found for event {event_id}'
+                logging.error(f'[{self.core_obj}={event_id}] {message}')
+                return HTTPStatus.NOT_FOUND, None, message
+
+        except QueryError as e:
+            message = f'Failed to query generation jobs: {str(e)}'
+            logging.error(f'[{self.core_obj}={event_id}] {message}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        except (TableDoesNotExist, PynamoDBConnectionError) as db_error:
+            message = f'Error on Table, Please check config(region, table name, etc): {str(db_error)}'
+            logging.error(f'[{self.core_obj}={event_id}] {message}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        logging.info(f'[{self.core_obj}={event_id}] Fetch generation jobs successful')
+        return HTTPStatus.OK, job_entries, None
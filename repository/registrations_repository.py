@@ -14,9 +14,14 @@ from pynamodb.exceptions import (
 )
 from pynamodb.transactions import TransactWrite
 
-from constants.common_constants import EntryStatus
+from constants.common_constants import CommonConstants, EntryStatus
 from model.registrations.registration import Registration, RegistrationIn
 from repository.repository_utils import RepositoryUtils
+from utils.rate_controller import get_rate_controller
+
+TRANSACT_WRITE_MAX_ITEMS = 25
+# Shared with the other repositories so that bulk runs back off together when the table throttles
+DYNAMODB_RATE_CONTROLLER = get_rate_controller('dynamodb')
 
 
 class RegistrationsRepository:
@@ -34,7 +39,7 @@ class RegistrationsRepository:
     def __init__(self) -> None:
         self.core_obj = 'Registration'
         self.current_date = datetime.utcnow().isoformat()
-        self.conn = Connection(region=os.getenv('REGION'))
+        self.conn = Connection(region=os.getenv('REGION'), max_retry_attempts=CommonConstants.DB_MAX_RETRY_ATTEMPTS)
 
     def query_registrations(
         self, event_id: str = None, registration_id: str = None
@@ -52,24 +57,30 @@ class RegistrationsRepository:
         """
         try:
             if event_id is None:
-                registration_entries = list(
-                    Registration.scan(
-                        filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                registration_entries = DYNAMODB_RATE_CONTROLLER.call(
+                    lambda: list(
+                        Registration.scan(
+                            filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                        )
                     )
                 )
             elif registration_id:
-                registration_entries = list(
-                    Registration.query(
-                        hash_key=event_id,
-                        range_key_condition=Registration.rangeKey.__eq__(registration_id),
-                        filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                registration_entries = DYNAMODB_RATE_CONTROLLER.call(
+                    lambda: list(
+                        Registration.query(
+                            hash_key=event_id,
+                            range_key_condition=Registration.rangeKey.__eq__(registration_id),
+                            filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                        )
                     )
                 )
             else:
-                registration_entries = list(
-                    Registration.query(
-                        hash_key=event_id,
-                        filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                registration_entries = DYNAMODB_RATE_CONTROLLER.call(
+                    lambda: list(
+                        Registration.query(
+                            hash_key=event_id,
+                            filter_condition=Registration.entryStatus == EntryStatus.ACTIVE.value,
+                        )
                     )
                 )
 
@@ -124,11 +135,13 @@ class RegistrationsRepository:
             if exclude_registration_id:
                 filter_condition &= Registration.registrationId != exclude_registration_id
 
-            registration_entries = list(
-                Registration.emailLSI.query(
-                    hash_key=event_id,
-                    range_key_condition=Registration.email.__eq__(email),
-                    filter_condition=filter_condition,
+            registration_entries = DYNAMODB_RATE_CONTROLLER.call(
+                lambda: list(
+                    Registration.emailLSI.query(
+                        hash_key=event_id,
+                        range_key_condition=Registration.email.__eq__(email),
+                        filter_condition=filter_condition,
+                    )
                 )
             )
 
@@ -171,22 +184,20 @@ class RegistrationsRepository:
             and an optional error message.
         """
         data = RepositoryUtils.load_data(pydantic_schema_in=registration_in, exclude_unset=True)
-        has_update, updated_data = RepositoryUtils.get_update(
-            old_data=RepositoryUtils.db_model_to_dict(registration_entry), new_data=data
-        )
-        if not has_update:
+        actions = RepositoryUtils.get_update_actions(model=registration_entry, new_data=data)
+        if not actions:
             return HTTPStatus.OK, registration_entry, 'No update'
 
-        try:
+        actions.append(Registration.updateDate.set(self.current_date))
+
+        def write_update():
             with TransactWrite(connection=self.conn) as transaction:
                 # Update Entry
-                updated_data.update(
-                    updateDate=self.current_date,
-                )
-                actions = [getattr(Registration, k).set(v) for k, v in updated_data.items()]
                 transaction.update(registration_entry, actions=actions)
 
-            registration_entry.refresh()
+        try:
+            DYNAMODB_RATE_CONTROLLER.call(write_update)
+            DYNAMODB_RATE_CONTROLLER.call(registration_entry.refresh)
             logging.info(f'[{registration_entry.rangeKey}] ' f'Update event data succesful')
             return HTTPStatus.OK, registration_entry, ''
 
@@ -195,6 +206,42 @@ class RegistrationsRepository:
             logging.error(f'[{registration_entry.rangeKey}] {message}')
             return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
 
+    def update_registrations(self, updates: List[Tuple[Registration, RegistrationIn]]) -> Tuple[HTTPStatus, str]:
+        """
+        Update many registration records in bulk transactions.
+
+        Args:
+            updates (List[Tuple[Registration, RegistrationIn]]): The existing registration records paired with their
+                new registration data.
+
+        Returns:
+            Tuple[HTTPStatus, str]: A tuple containing HTTP status and an optional error message.
+        """
+        pending = []
+        for registration_entry, registration_in in updates:
+            data = RepositoryUtils.load_data(pydantic_schema_in=registration_in, exclude_unset=True)
+            actions = RepositoryUtils.get_update_actions(model=registration_entry, new_data=data)
+            if actions:
+                actions.append(Registration.updateDate.set(self.current_date))
+                pending.append((registration_entry, actions))
+
+        def write_batch(batch):
+            with TransactWrite(connection=self.conn) as transaction:
+                for registration_entry, actions in batch:
+                    transaction.update(registration_entry, actions=actions)
+
+        for start in range(0, len(pending), TRANSACT_WRITE_MAX_ITEMS):
+            try:
+                DYNAMODB_RATE_CONTROLLER.call(write_batch, pending[start : start + TRANSACT_WRITE_MAX_ITEMS])
+
+            except TransactWriteError as e:
+                message = f'Failed to bulk update registration data: {str(e)}'
+                logging.error(f'[{self.core_obj}] {message}')
+                return HTTPStatus.INTERNAL_SERVER_ERROR, message
+
+        logging.info(f'[{self.core_obj}] Bulk update of {len(pending)} registrations successful')
+        return HTTPStatus.OK, None
+
     def delete_registration(self, registration_entry: Registration) -> HTTPStatus:
         """
         Delete a registration record from the database.
@@ -206,7 +253,7 @@ class RegistrationsRepository:
             HTTPStatus: The HTTP status of the operation.
         """
         try:
-            registration_entry.delete()
+            DYNAMODB_RATE_CONTROLLER.call(registration_entry.delete)
             logging.info(f'[{registration_entry.rangeKey}] ' f'Delete event data successful')
             return HTTPStatus.OK, None
 
@@ -1,32 +1,72 @@
 import json
-from copy import deepcopy
-from typing import Tuple
+from typing import Any, List
 
 from pynamodb.attributes import MapAttribute
+from pynamodb.expressions.update import Action
 from pynamodb.models import Model
 
 from constants.common_constants import CommonConstants
 
+EXCLUDE_COMPARISON_KEYS = frozenset(CommonConstants.EXCLUDE_COMPARISON_KEYS)
+
 
 class RepositoryUtils:
     @staticmethod
-    def get_update(old_data: dict, new_data: dict) -> Tuple[bool, dict]:
-        excluded_comparison_keys = deepcopy(CommonConstants.EXCLUDE_COMPARISON_KEYS)
+    def get_update_actions(model: Model, new_data: dict) -> List[Action]:
+        """
+        Diff incoming data against a model instance and build the minimal list of update actions.
+
+        Only the keys present in ``new_data`` are compared, straight against the model attributes, so the
+        existing item is never serialized or copied. Nested dicts follow the ``update_nested_dict`` merge
+        semantics: existing maps are updated key by key, and missing maps are created from the new values.
+
+        Args:
+            model (Model): The existing database entry.
+            new_data (dict): The incoming data, usually from ``load_data(..., exclude_unset=True)``.
 
-        # copy old_data
-        old_data_copy = deepcopy(old_data)
-        for key in excluded_comparison_keys:
-            old_data_copy.pop(key, None)
+        Returns:
+            List[Action]: The update actions, empty when nothing changed.
+        """
+        attributes = model.get_attributes()
+        actions = []
+        for key, new_val in new_data.items():
+            attribute = attributes.get(key)
+            if attribute is None or key in EXCLUDE_COMPARISON_KEYS:
+                continue
 
-        # set updated_data
-        updated_data = deepcopy(old_data_copy)
-        RepositoryUtils.update_nested_dict(updated_data, new_data)
-        has_update = updated_data != old_data_copy
+            RepositoryUtils.diff_value(path=attribute, old_val=getattr(model, key), new_val=new_val, actions=actions)
 
-        # Change to MapAttribute
-        updated_data = RepositoryUtils.items_to_map_attr(updated_data)
+        return actions
+
+    @staticmethod
+    def diff_value(path, old_val: Any, new_val: Any, actions: List[Action]) -> None:
+        if isinstance(new_val, dict):
+            old_map = RepositoryUtils.map_values(old_val)
+            if old_map is None:
+                # The parent map does not exist yet, so it has to be written whole
+                new_map = RepositoryUtils.update_nested_dict({}, new_val)
+                actions.append(path.set(MapAttribute(**RepositoryUtils.items_to_map_attr(new_map))))
+                return
 
-        return has_update, updated_data
+            for sub_key, sub_val in new_val.items():
+                RepositoryUtils.diff_value(
+                    path=path[sub_key], old_val=old_map.get(sub_key), new_val=sub_val, actions=actions
+                )
+
+        elif new_val is None:
+            if old_val is not None:
+                actions.append(path.remove())
+
+        elif new_val != old_val:
+            actions.append(path.set(new_val))
+
+    @staticmethod
+    def map_values(val: Any):
+        if isinstance(val, MapAttribute):
+            return val.attribute_values
+        if isinstance(val, dict):
+            return val
+        return None
 
     @staticmethod
     def update_nested_dict(old_dict: dict, new_data: dict):
@@ -3,13 +3,26 @@ import logging
 import os
 import zipfile
 from http import HTTPStatus
-from typing import List
+from typing import Dict, List
 
 from boto3 import client as boto3_client
+from botocore.config import Config
 
 from s3.exceptions import PdfServiceInternalError
 from s3.s3_constants import PresignedURLMethod
-from utils.logger import logger
+from utils.logger import SAMPLED, logger
+from utils.rate_controller import get_rate_controller
+from utils.ttl_cache import TTLCache
+
+# Per-container cache of signed GET URLs, reused until a safety margin before they expire
+PRESIGNED_URL_CACHE = TTLCache(max_size=int(os.getenv('PRESIGNED_URL_CACHE_MAX_SIZE', '10000')))
+PRESIGNED_URL_SAFETY_MARGIN_SECONDS = int(os.getenv('PRESIGNED_URL_SAFETY_MARGIN_SECONDS', '300'))
+# Signatures from the function role's temporary credentials stop working once those credentials rotate
+PRESIGNED_URL_CACHE_MAX_TTL_SECONDS = int(os.getenv('PRESIGNED_URL_CACHE_MAX_TTL_SECONDS', '1800'))
+# Shared by every S3DataStore so that SlowDown responses back off the whole container
+S3_RATE_CONTROLLER = get_rate_controller('s3')
+# SDK retries would hide SlowDown responses from the rate controller, so it retries them instead
+S3_CLIENT_CONFIG = Config(retries={'total_max_attempts': 1})
 
 
 # pylint: disable=broad-except
@@ -17,20 +30,25 @@ class S3DataStore:
     __slots__ = ['__s3_client', '__bucket_name', '__logger']
 
     def __init__(self, bucket_name=os.environ['S3_BUCKET']):
-        self.__s3_client = boto3_client('s3')
+        self.__s3_client = boto3_client('s3', config=S3_CLIENT_CONFIG)
         self.__bucket_name = bucket_name
 
-    def upload_file(self, file_name: str, object_name: str = None, verbose: bool = True) -> bool:
+    def upload_file(
+        self, file_name: str, object_name: str = None, verbose: bool = True, metadata: Dict[str, str] = None
+    ) -> bool:
         result = True
 
         # If S3 object_name was not specified, use file_name
         if object_name is None:
             object_name = file_name
 
+        extra_args = {'Metadata': metadata} if metadata else None
         try:
-            self.__s3_client.upload_file(file_name, self.__bucket_name, object_name)
+            S3_RATE_CONTROLLER.call(
+                self.__s3_client.upload_file, file_name, self.__bucket_name, object_name, ExtraArgs=extra_args
+            )
             if verbose:
-                logger.info('Stored file in S3: %s/%s', self.__bucket_name, object_name)
+                logger.info('Stored file in S3: %s/%s', self.__bucket_name, object_name, extra=SAMPLED)
         except Exception as e:
             message = f'Failed to upload file ({file_name}) to S3, Reason: {type(e).__name__} - {str(e)}'
             logger.error(message)
@@ -42,7 +60,7 @@ class S3DataStore:
         result = True
 
         try:
-            self.__s3_client.download_file(self.__bucket_name, object_name, file_name)
+            S3_RATE_CONTROLLER.call(self.__s3_client.download_file, self.__bucket_name, object_name, file_name)
             if verbose:
                 logger.info('Downloaded file in S3: %s/%s', self.__bucket_name, object_name)
         except Exception as e:
@@ -62,11 +80,13 @@ class S3DataStore:
                 # Iterate over the files and add them to the zip
                 for key in bucket_keys:
                     # Read and add the file to the zip buffer
-                    content = self.__s3_client.get_object(Bucket=self.__bucket_name, Key=key)
+                    content = S3_RATE_CONTROLLER.call(self.__s3_client.get_object, Bucket=self.__bucket_name, Key=key)
                     zip_file.writestr(key.split('/')[-1], content['Body'].read())
 
             # Upload the zip file to S3
-            self.__s3_client.put_object(Body=zip_buffer.getvalue(), Bucket=self.__bucket_name, Key=output_zip_key)
+            S3_RATE_CONTROLLER.call(
+                self.__s3_client.put_object, Body=zip_buffer.getvalue(), Bucket=self.__bucket_name, Key=output_zip_key
+            )
 
             if verbose:
                 logger.info('Stored file in S3: %s', f'{self.__bucket_name}/{output_zip_key}')
@@ -82,6 +102,9 @@ class S3DataStore:
         expires_in: int = 3600,
         content_type: str = None,
     ) -> str:
+        if method == PresignedURLMethod.GET_OBJECT:
+            return self.generate_presigned_urls(object_names=[object_name], expires_in=expires_in)[object_name]
+
         try:
             params = {'Bucket': self.__bucket_name, 'Key': object_name}
             if method == PresignedURLMethod.PUT_OBJECT:
@@ -90,7 +113,7 @@ class S3DataStore:
             url = self.__s3_client.generate_presigned_url(
                 ClientMethod=method.value, Params=params, ExpiresIn=expires_in
             )
-            logger.info('Pre-signed URL generated for file: %s', object_name)
+            logger.info('Pre-signed URL generated for file: %s', object_name, extra=SAMPLED)
         except Exception as e:
             message = (
                 f'Failed to generate pre-signed URl for file: ({object_name}), '
@@ -102,12 +125,65 @@ class S3DataStore:
 
         return url
 
+    def generate_presigned_urls(self, object_names: List[str], expires_in: int = 3600) -> Dict[str, str]:
+        """
+        Generate pre-signed GET URLs for many files in one call.
+
+        A URL signed earlier in this container is reused while it has more than the safety margin left before it
+        expires.
+
+        Args:
+            object_names (List[str]): The object keys to sign. Empty keys are skipped.
+            expires_in (int, optional): The lifetime of newly signed URLs in seconds.
+
+        Returns:
+            Dict[str, str]: The pre-signed URL of each object key.
+        """
+        cache_ttl = min(expires_in - PRESIGNED_URL_SAFETY_MARGIN_SECONDS, PRESIGNED_URL_CACHE_MAX_TTL_SECONDS)
+        method = PresignedURLMethod.GET_OBJECT.value
+        urls = {}
+        signed_count = 0
+        for object_name in object_names:
+            if not object_name or object_name in urls:
+                continue
+
+            cache_key = (self.__bucket_name, object_name, expires_in)
+            url = PRESIGNED_URL_CACHE.get(cache_key)
+            if url is None:
+                try:
+                    url = self.__s3_client.generate_presigned_url(
+                        ClientMethod=method,
+                        Params={'Bucket': self.__bucket_name, 'Key': object_name},
+                        ExpiresIn=expires_in,
+                    )
+                except Exception as e:
+                    message = (
+                        f'Failed to generate pre-signed URl for file: ({object_name}), '
+                        f'Reason: '
+                        f'{type(e).__name__} - {str(e)}'
+                    )
+                    logger.error(message)
+                    raise PdfServiceInternalError(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, message=message) from e
+
+                signed_count += 1
+                if cache_ttl > 0:
+                    PRESIGNED_URL_CACHE.set(cache_key, url, ttl=cache_ttl)
+
+            urls[object_name] = url
+
+        logger.info(
+            'Pre-signed URLs generated for %s files (%s reused)', len(urls), len(urls) - signed_count, extra=SAMPLED
+        )
+        return urls
+
     def get_files(self, directory_name: str):
-        return self.__s3_client.list_objects_v2(Bucket=self.__bucket_name, Prefix=directory_name)['Contents']
+        return S3_RATE_CONTROLLER.call(
+            self.__s3_client.list_objects_v2, Bucket=self.__bucket_name, Prefix=directory_name
+        )['Contents']
 
     def delete_file(self, object_name: str):
         try:
-            self.__s3_client.delete_object(Bucket=self.__bucket_name, Key=object_name)
+            S3_RATE_CONTROLLER.call(self.__s3_client.delete_object, Bucket=self.__bucket_name, Key=object_name)
         except Exception as e:
             logger.error('Failed to delete file (%s), Reason: %s - %s', object_name, type(e).__name__, str(e))
             return False
@@ -116,7 +192,9 @@ class S3DataStore:
 
     def get_file(self, object_key):
         try:
-            s3_response = self.__s3_client.get_object(Bucket=self.__bucket_name, Key=object_key)
+            s3_response = S3_RATE_CONTROLLER.call(
+                self.__s3_client.get_object, Bucket=self.__bucket_name, Key=object_key
+            )
         except Exception as e:
             logger.error('Failed to get file (%s), Reason: %s - %s', object_key, type(e).__name__, str(e))
             return None
@@ -129,11 +207,32 @@ class S3DataStore:
             return False
         return bool(self.get_file(object_key=path))
 
-    def copy_object(self, src_bucket, src_key, target_key):
+    def get_file_metadata(self, object_key: str) -> dict:
+        """Get the ETag and user metadata of an S3 object without downloading it."""
+        try:
+            s3_response = S3_RATE_CONTROLLER.call(
+                self.__s3_client.head_object, Bucket=self.__bucket_name, Key=object_key
+            )
+        except Exception as e:
+            logger.debug('Failed to get file metadata (%s), Reason: %s - %s', object_key, type(e).__name__, str(e))
+            return None
+
+        return {'ETag': s3_response.get('ETag'), 'Metadata': s3_response.get('Metadata', {})}
+
+    def copy_object(self, src_bucket, src_key, target_key) -> bool:
         try:
-            self.__s3_client.copy_object(
-                CopySource={'Bucket': src_bucket, 'Key': src_key}, Bucket=self.__bucket_name, Key=target_key
+            S3_RATE_CONTROLLER.call(
+                self.__s3_client.copy_object,
+                CopySource={'Bucket': src_bucket, 'Key': src_key},
+                Bucket=self.__bucket_name,
+                Key=target_key,
             )
         except Exception as e:
             logger.error('Failed to get copy (%s), Reason: %s - %s', src_key, type(e).__name__, str(e))
-            return
+            return False
+
+        return True
+
+    @property
+    def bucket_name(self) -> str:
+        return self.__bucket_name
@@ -0,0 +1,77 @@
+import timeit
+import tracemalloc
+from copy import deepcopy
+
+from constants.common_constants import CommonConstants
+from model.registrations.registration import Registration, RegistrationIn
+from repository.repository_utils import RepositoryUtils
+
+ITERATIONS = 20000
+
+
+def legacy_get_update(old_data: dict, new_data: dict):
+    """The deepcopy-based diff that RepositoryUtils.get_update_actions replaced."""
+    excluded_comparison_keys = deepcopy(CommonConstants.EXCLUDE_COMPARISON_KEYS)
+    old_data_copy = deepcopy(old_data)
+    for key in excluded_comparison_keys:
+        old_data_copy.pop(key, None)
+
+    updated_data = deepcopy(old_data_copy)
+    RepositoryUtils.update_nested_dict(updated_data, new_data)
+    has_update = updated_data != old_data_copy
+    updated_data = RepositoryUtils.items_to_map_attr(updated_data)
+    actions = [getattr(Registration, k).set(v) for k, v in updated_data.items()]
+    return has_update, actions
+
+
+def build_registration() -> Registration:
+    return Registration(
+        hashKey='event-id',
+        rangeKey='registration-id',
+        registrationId='registration-id',
+        entryStatus='ACTIVE',
+        createDate='2023-11-01T00:00:00',
+        updateDate='2023-11-01T00:00:00',
+        eventId='event-id',
+        email='juan@example.com',
+        certificateClaimed=False,
+        firstName='Juan',
+        lastName='Dela Cruz',
+        contactNumber='09171234567',
+        careerStatus='Professional',
+        yearsOfExperience='3',
+        organization='SPARCS',
+        title='Engineer',
+        amountPaid=100,
+    )
+
+
+def measure(label: str, func):
+    func()
+    seconds = timeit.timeit(func, number=ITERATIONS)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<10} {seconds / ITERATIONS * 1e6:8.1f} us/call  {peak / 1024:8.1f} KiB peak')
+
+
+def benchmark_get_update():
+    registration = build_registration()
+    data = RepositoryUtils.load_data(
+        pydantic_schema_in=RegistrationIn(
+            certificateImgObjectKey='certificates/event-id/registration-id.png',
+            certificatePdfObjectKey='certificates/event-id/registration-id.pdf',
+        ),
+        exclude_unset=True,
+    )
+
+    measure(
+        'legacy',
+        lambda: legacy_get_update(old_data=RepositoryUtils.db_model_to_dict(registration), new_data=data),
+    )
+    measure('diff', lambda: RepositoryUtils.get_update_actions(model=registration, new_data=data))
+
+
+if __name__ == '__main__':
+    benchmark_get_update()
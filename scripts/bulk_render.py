@@ -0,0 +1,192 @@
+"""
+Render certificates offline from a CSV or JSONL attendee file, without any AWS dependency.
+
+Each record needs either a ``name`` field or ``firstName`` and ``lastName`` fields, and may carry a ``registrationId``
+used in the output file names. Rendering is spread over all local cores, and re-running the same command resumes
+where it stopped. With ``--zip``, certificates are rendered into the output directory as usual and collected into the
+archive at the end, so a killed run never leaves a half-written archive behind.
+
+    python -m scripts.bulk_render attendees.csv --template template.png --output certificates/
+    python -m scripts.bulk_render attendees.jsonl --template template.png --output certificates/ --zip
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from multiprocessing import Pool, cpu_count
+from typing import Iterator, List, Optional, Tuple
+
+from usecase.certificate_renderer import CertificateRenderer
+from usecase.name_layout import NameLayout
+
+PROGRESS_INTERVAL_SECONDS = 5
+
+_renderer: Optional[CertificateRenderer] = None
+_name_layout: Optional[NameLayout] = None
+_with_image = True
+
+
+def read_attendees(path: str) -> Iterator[Tuple[str, str]]:
+    """Stream (certificate name, attendee name) pairs from a CSV or JSONL file."""
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.endswith('.jsonl'):
+            records = (json.loads(line) for line in file if line.strip())
+        else:
+            records = csv.DictReader(file)
+
+        for index, record in enumerate(records, start=1):
+            name = record.get('name') or f"{record.get('firstName', '')} {record.get('lastName', '')}".strip()
+            if not name:
+                continue
+
+            record_id = record.get('registrationId') or f'{index:06d}'
+            slug = re.sub(r'\W+', '-', name).strip('-')
+            yield f'{record_id}-{slug}', name
+
+
+def init_worker(template_img_path: str, work_root: str, with_image: bool):
+    global _renderer, _name_layout, _with_image  # pylint: disable=global-statement
+    _renderer = CertificateRenderer(
+        template_img_path=template_img_path, work_dir=tempfile.mkdtemp(prefix='worker-', dir=work_root)
+    )
+    # Each worker loads the font metrics once and reuses its glyph advance table for every name
+    _name_layout = NameLayout()
+    _with_image = with_image
+
+
+def render_attendee(attendee: Tuple[str, str]) -> Tuple[str, List[str], Optional[str]]:
+    certificate_name, name = attendee
+    try:
+        rendered = _renderer.render(
+            name=name,
+            certificate_name=certificate_name,
+            font_size=_name_layout.font_size(name),
+            with_image=_with_image,
+        )
+    except Exception as e:
+        return certificate_name, [], f'{type(e).__name__} - {str(e)}'
+
+    return certificate_name, [path for path in (rendered.pdf_path, rendered.image_path) if path], None
+
+
+def read_archive(zip_path: str) -> List[str]:
+    """List the entries of an archive, or none if it is missing or unreadable."""
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            return archive.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return []
+
+
+def write_archive(zip_path: str, output: str, file_names: List[str]):
+    """
+    Add rendered files to the archive and remove them from the output directory.
+
+    The archive is rebuilt next to the old one and moved over it, so it is replaced only once it is complete.
+    """
+    if not file_names:
+        return
+
+    partial_path = f'{zip_path}.partial'
+    kept_entries = sorted(set(read_archive(zip_path)) - set(file_names))
+    with zipfile.ZipFile(partial_path, 'w', zipfile.ZIP_STORED) as archive:
+        if kept_entries:
+            with zipfile.ZipFile(zip_path) as old_archive:
+                for entry in kept_entries:
+                    archive.writestr(old_archive.getinfo(entry), old_archive.read(entry))
+        for file_name in file_names:
+            archive.write(os.path.join(output, file_name), arcname=file_name)
+
+    os.replace(partial_path, zip_path)
+    for file_name in file_names:
+        os.remove(os.path.join(output, file_name))
+
+
+def format_progress(counts: dict, elapsed: float) -> str:
+    rate = counts['rendered'] / elapsed if elapsed else 0
+    return ' '.join(f'{key}={value}' for key, value in counts.items()) + f' rate={rate:.1f}/s'
+
+
+def bulk_render():
+    parser = argparse.ArgumentParser(description='Render certificates offline from a CSV/JSONL attendee file.')
+    parser.add_argument('attendees', help='The CSV or JSONL attendee file')
+    parser.add_argument('--template', required=True, help='The certificate template image')
+    parser.add_argument('--output', required=True, help='The output directory')
+    parser.add_argument('--formats', nargs='+', choices=['pdf', 'png'], default=['pdf', 'png'])
+    parser.add_argument('--zip', action='store_true', help='Collect the certificates in <output>/certificates.zip')
+    parser.add_argument('--workers', type=int, default=cpu_count(), help='The number of render processes')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    zip_path = os.path.join(args.output, 'certificates.zip')
+    archived = set(read_archive(zip_path)) if args.zip else set()
+    done = archived | set(os.listdir(args.output))
+    # The loose files of every attendee, including those of an earlier run that stopped before archiving
+    unarchived = []
+
+    def is_done(attendee: Tuple[str, str]) -> bool:
+        return all(f'{attendee[0]}.{extension}' in done for extension in args.formats)
+
+    counts = {'rendered': 0, 'skipped': 0, 'failed': 0}
+
+    def pending_attendees() -> Iterator[Tuple[str, str]]:
+        for attendee in read_attendees(args.attendees):
+            for extension in args.formats:
+                file_name = f'{attendee[0]}.{extension}'
+                if file_name not in archived:
+                    unarchived.append(file_name)
+            if is_done(attendee):
+                counts['skipped'] += 1
+                continue
+            yield attendee
+
+    # Render next to the output, so that finished files are moved in atomically on the same filesystem
+    work_root = tempfile.mkdtemp(prefix='.bulk-render-', dir=args.output)
+    started_at = last_report = time.monotonic()
+    try:
+        with Pool(
+            processes=args.workers,
+            initializer=init_worker,
+            initargs=(os.path.abspath(args.template), work_root, 'png' in args.formats),
+        ) as pool:
+            for certificate_name, paths, error in pool.imap_unordered(render_attendee, pending_attendees(), 4):
+                if error:
+                    counts['failed'] += 1
+                    print(f'Failed to render {certificate_name}: {error}', file=sys.stderr)
+                    continue
+
+                for path in paths:
+                    file_name = os.path.basename(path)
+                    if os.path.splitext(file_name)[1][1:] not in args.formats:
+                        os.remove(path)
+                    else:
+                        # Move finished files in atomically, so a resumed run never trusts a partial file
+                        os.replace(path, os.path.join(args.output, file_name))
+                counts['rendered'] += 1
+
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    last_report = now
+                    print(format_progress(counts, elapsed=now - started_at))
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    if args.zip:
+        write_archive(
+            zip_path,
+            output=args.output,
+            file_names=[name for name in unarchived if os.path.exists(os.path.join(args.output, name))],
+        )
+
+    elapsed = time.monotonic() - started_at
+    print(f'Done in {elapsed:.1f}s: {format_progress(counts, elapsed=elapsed)}')
+
+
+if __name__ == '__main__':
+    bulk_render()
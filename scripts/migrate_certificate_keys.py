@@ -0,0 +1,18 @@
+import argparse
+
+from usecase.certificate_usecase import CertificateUsecase
+
+
+def migrate_certificate_keys():
+    parser = argparse.ArgumentParser(description='Move rendered certificates to the configured S3 key layout.')
+    parser.add_argument('event_ids', nargs='+', help='The events whose certificates are migrated')
+    parser.add_argument('--delete-source', action='store_true', help='Delete the objects under the old keys')
+    args = parser.parse_args()
+
+    cert = CertificateUsecase()
+    for event_id in args.event_ids:
+        cert.migrate_certificate_keys(event_id=event_id, delete_source=args.delete_source)
+
+
+if __name__ == '__main__':
+    migrate_certificate_keys()
@@ -1,4 +1,19 @@
+import os
+from pathlib import Path
+
+from constants.certificate_constants import CertificateConstants
+
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, 'certificate_template.html')
+# The name is rendered and measured with this same font file, so fitted sizes match the rendered width
+NAME_FONT_PATH = os.path.join(TEMPLATE_DIR, 'fonts', CertificateConstants.NAME_FONT)
+
+
 def html_template():
-    with open('./template/certificate_template.html', 'r') as template:
+    with open(TEMPLATE_PATH, 'r') as template:
         content = template.read()
     return content
+
+
+def name_font_url():
+    return Path(NAME_FONT_PATH).as_uri()
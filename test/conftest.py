@@ -0,0 +1,12 @@
+import os
+
+# Module-level configuration is read at import time, so it has to be in place before the modules under test load
+os.environ.setdefault('REGION', 'ap-southeast-1')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('S3_BUCKET', 'test-bucket')
+os.environ.setdefault('REGISTRATIONS_TABLE', 'test-registrations')
+os.environ.setdefault('ENTITIES_TABLE', 'test-entities')
+os.environ.setdefault('EVENTS_TABLE', 'test-events')
+os.environ.setdefault('CERTIFICATE_CLAIM_QUEUE', 'test-certificate-claim-queue.fifo')
@@ -0,0 +1,198 @@
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+
+try:
+    from usecase import certificate_usecase
+except OSError as e:  # WeasyPrint loads the system pango/cairo libraries on import
+    pytest.skip(f'WeasyPrint system libraries are missing: {e}', allow_module_level=True)
+
+from constants.certificate_constants import CertificateKeyLayoutType
+from model.generation_jobs.generation_jobs_constants import GenerationJobStatus
+from usecase.certificate_key_layout import CertificateKeyLayout
+
+
+@pytest.fixture
+def jobs_repository(mocker):
+    repository = MagicMock()
+    mocker.patch.object(certificate_usecase, 'GenerationJobsRepository', return_value=repository)
+    for collaborator in ('S3DataStore', 'RegistrationsRepository', 'EventsRepository'):
+        mocker.patch.object(certificate_usecase, collaborator)
+    return repository
+
+
+def conflict(request_id: str, job_status: GenerationJobStatus):
+    job = MagicMock(requestId=request_id, jobStatus=job_status.value)
+    return HTTPStatus.CONFLICT, job, 'Generation job event-1#ALL is already running or completed'
+
+
+def test_redelivery_of_crashed_run_is_retried(jobs_repository):
+    jobs_repository.claim_job.return_value = conflict('m1', GenerationJobStatus.RUNNING)
+
+    is_handled = certificate_usecase.CertificateUsecase().generate_certficates(event_id='event-1', request_id='m1')
+
+    assert is_handled is False
+
+
+def test_duplicate_of_running_job_is_dropped(jobs_repository):
+    jobs_repository.claim_job.return_value = conflict('m1', GenerationJobStatus.RUNNING)
+
+    is_handled = certificate_usecase.CertificateUsecase().generate_certficates(event_id='event-1', request_id='m2')
+
+    assert is_handled is True
+
+
+def test_redelivery_of_completed_job_is_dropped(jobs_repository):
+    jobs_repository.claim_job.return_value = conflict('m1', GenerationJobStatus.COMPLETED)
+
+    is_handled = certificate_usecase.CertificateUsecase().generate_certficates(event_id='event-1', request_id='m1')
+
+    assert is_handled is True
+
+
+LEGACY_KEYS = (
+    'certificates/event-1/Ana Cruz/event-1_Ana Cruz.pdf',
+    'certificates/event-1/Ana Cruz/event-1_Ana Cruz.png',
+)
+
+
+@pytest.fixture
+def migration(mocker):
+    data_store = MagicMock(bucket_name='test-bucket')
+    data_store.copy_object.return_value = True
+    registrations_repository = MagicMock()
+    registrations_repository.update_registrations.return_value = HTTPStatus.OK, None
+    mocker.patch.object(certificate_usecase, 'S3DataStore', return_value=data_store)
+    mocker.patch.object(certificate_usecase, 'RegistrationsRepository', return_value=registrations_repository)
+    mocker.patch.object(certificate_usecase, 'EventsRepository')
+    mocker.patch.object(certificate_usecase, 'GenerationJobsRepository')
+    mocker.patch.object(
+        certificate_usecase,
+        'CertificateKeyLayout',
+        return_value=CertificateKeyLayout(layout=CertificateKeyLayoutType.REGISTRATION.value, shard_width=0),
+    )
+    return data_store, registrations_repository
+
+
+def legacy_registrations(*registration_ids: str) -> list:
+    # Attendees with the same name share the legacy name-based keys
+    return [
+        MagicMock(
+            registrationId=registration_id,
+            certificatePdfObjectKey=LEGACY_KEYS[0],
+            certificateImgObjectKey=LEGACY_KEYS[1],
+        )
+        for registration_id in registration_ids
+    ]
+
+
+def deleted_keys(data_store: MagicMock) -> set:
+    return {call.kwargs['object_name'] for call in data_store.delete_file.call_args_list}
+
+
+def test_migration_deletes_sources_once_every_sharer_migrated(migration):
+    data_store, registrations_repository = migration
+    registrations_repository.query_registrations.return_value = HTTPStatus.OK, legacy_registrations('r1', 'r2'), None
+
+    certificate_usecase.CertificateUsecase().migrate_certificate_keys(event_id='event-1', delete_source=True)
+
+    updates = registrations_repository.update_registrations.call_args.kwargs['updates']
+    assert [update.certificatePdfObjectKey for _, update in updates] == [
+        'certificates/event-1/r1.pdf',
+        'certificates/event-1/r2.pdf',
+    ]
+    assert deleted_keys(data_store) == set(LEGACY_KEYS)
+    assert data_store.delete_file.call_count == 2
+
+
+def test_migration_keeps_legacy_keys_shared_with_unmigrated_registration(migration):
+    data_store, registrations_repository = migration
+    registrations_repository.query_registrations.return_value = HTTPStatus.OK, legacy_registrations('r1', 'r2'), None
+    data_store.copy_object.side_effect = lambda src_bucket, src_key, target_key: 'r2' not in target_key
+
+    certificate_usecase.CertificateUsecase().migrate_certificate_keys(event_id='event-1', delete_source=True)
+
+    updates = registrations_repository.update_registrations.call_args.kwargs['updates']
+    assert [registration.registrationId for registration, _ in updates] == ['r1']
+    data_store.delete_file.assert_not_called()
+
+
+def test_migration_skips_registration_whose_copy_failed(migration):
+    data_store, registrations_repository = migration
+    registrations_repository.query_registrations.return_value = HTTPStatus.OK, legacy_registrations('r1'), None
+    data_store.copy_object.return_value = False
+
+    certificate_usecase.CertificateUsecase().migrate_certificate_keys(event_id='event-1', delete_source=True)
+
+    registrations_repository.update_registrations.assert_called_once_with(updates=[])
+    data_store.delete_file.assert_not_called()
+
+
+def test_migration_keeps_sources_when_registration_update_failed(migration):
+    data_store, registrations_repository = migration
+    registrations_repository.query_registrations.return_value = HTTPStatus.OK, legacy_registrations('r1', 'r2'), None
+    registrations_repository.update_registrations.return_value = HTTPStatus.INTERNAL_SERVER_ERROR, 'Failed'
+
+    certificate_usecase.CertificateUsecase().migrate_certificate_keys(event_id='event-1', delete_source=True)
+
+    data_store.delete_file.assert_not_called()
+
+
+@pytest.fixture
+def bulk_run(mocker, jobs_repository):
+    registrations = [MagicMock(registrationId=f'r{index}', firstName='Ana', lastName='Cruz') for index in range(3)]
+    usecase = certificate_usecase.CertificateUsecase()
+    events_repository = certificate_usecase.EventsRepository.return_value
+    events_repository.query_events.return_value = HTTPStatus.OK, MagicMock(certificateTemplate='template.png'), None
+    registrations_repository = certificate_usecase.RegistrationsRepository.return_value
+    registrations_repository.query_registrations.return_value = HTTPStatus.OK, registrations, None
+    jobs_repository.claim_job.return_value = HTTPStatus.OK, MagicMock(entryId='event-1#ALL'), None
+    jobs_repository.update_progress.return_value = HTTPStatus.OK, None, None
+    mocker.patch.object(certificate_usecase, 'JOB_PROGRESS_INTERVAL', 1)
+    mocker.patch.object(certificate_usecase, 'ContactSheetBuilder')
+    mocker.patch.object(usecase, '_CertificateUsecase__prepare_render', return_value=(MagicMock(), MagicMock()))
+    generate = mocker.patch.object(
+        usecase, '_CertificateUsecase__generate_certificate', return_value=('a.pdf', 'a.png', False)
+    )
+    return usecase, generate
+
+
+def test_progress_updates_renew_the_lease(bulk_run, jobs_repository):
+    usecase, generate = bulk_run
+
+    is_handled = usecase.generate_certficates(event_id='event-1', request_id='m1')
+
+    assert is_handled is True
+    assert generate.call_count == 3
+    progress_calls = jobs_repository.update_progress.call_args_list[:-1]
+    assert all(call.kwargs['lease_seconds'] == certificate_usecase.JOB_LEASE_SECONDS for call in progress_calls)
+    assert jobs_repository.update_progress.call_args.kwargs['job_status'] == GenerationJobStatus.COMPLETED
+
+
+def test_run_stops_once_its_job_is_taken_over(bulk_run, jobs_repository):
+    usecase, generate = bulk_run
+    jobs_repository.update_progress.side_effect = [
+        (HTTPStatus.OK, None, None),
+        (HTTPStatus.CONFLICT, None, 'Generation job event-1#ALL was taken over by another request'),
+    ]
+
+    is_handled = usecase.generate_certficates(event_id='event-1', request_id='m1')
+
+    assert is_handled is True
+    assert generate.call_count == 1
+    # The final status belongs to the run that took the job over
+    assert all('job_status' not in call.kwargs for call in jobs_repository.update_progress.call_args_list)
+
+
+def test_run_over_memory_budget_is_interrupted_for_retry(mocker, bulk_run, jobs_repository):
+    usecase, generate = bulk_run
+    memory_budget = mocker.patch.object(certificate_usecase, 'MemoryBudget').return_value
+    memory_budget.chunk_size = 16
+    memory_budget.within_budget.side_effect = [True, False]
+
+    is_handled = usecase.generate_certficates(event_id='event-1', request_id='m1')
+
+    assert is_handled is False
+    assert generate.call_count == 2
+    assert jobs_repository.update_progress.call_args.kwargs['job_status'] == GenerationJobStatus.INTERRUPTED
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+
+from model.events.event import Event
+from repository.events_repository import EVENT_CACHE, EventsRepository
+
+
+@pytest.fixture
+def query(mocker):
+    EVENT_CACHE.clear()
+    event = Event(hashKey='v0', rangeKey='admin#event-1', eventId='event-1', updateDate='2024-01-01T00:00:00')
+    yield mocker.patch.object(Event.eventIdIndex, 'query', return_value=[event])
+    EVENT_CACHE.clear()
+
+
+def test_query_events_serves_repeat_lookups_from_cache(query):
+    repository = EventsRepository()
+
+    first_status, first_event, _ = repository.query_events(event_id='event-1')
+    second_status, second_event, _ = repository.query_events(event_id='event-1')
+
+    assert first_status == second_status == HTTPStatus.OK
+    assert second_event is first_event
+    assert query.call_count == 1
+
+
+def test_query_events_bypasses_cache(query):
+    repository = EventsRepository()
+
+    repository.query_events(event_id='event-1')
+    repository.query_events(event_id='event-1', use_cache=False)
+
+    assert query.call_count == 2
+
+
+def test_invalidate_event_cache_forces_query(query):
+    repository = EventsRepository()
+
+    repository.query_events(event_id='event-1')
+    repository.invalidate_event_cache(event_id='event-1')
+    repository.query_events(event_id='event-1')
+
+    assert query.call_count == 2
+
+
+def test_revalidate_drops_stale_event(query):
+    repository = EventsRepository()
+    repository.query_events(event_id='event-1')
+
+    query.return_value = [Event(hashKey='v0', eventId='event-1', updateDate='2024-02-01T00:00:00')]
+    _, event, _ = repository.query_events(event_id='event-1', revalidate=True)
+
+    # One query to fill the cache, one to revalidate, one to reload the stale event
+    assert query.call_count == 3
+    assert event.updateDate == '2024-02-01T00:00:00'
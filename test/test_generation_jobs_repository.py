@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from botocore.exceptions import ClientError
+from pynamodb.exceptions import UpdateError
+
+from model.generation_jobs.generation_job import GenerationJob
+from model.generation_jobs.generation_jobs_constants import GenerationJobStatus
+from repository.generation_jobs_repository import GenerationJobsRepository
+
+
+@pytest.fixture
+def save(mocker):
+    return mocker.patch.object(GenerationJob, 'save', autospec=True)
+
+
+@pytest.fixture
+def update(mocker):
+    return mocker.patch.object(GenerationJob, 'update', autospec=True)
+
+
+def conditional_check_failed() -> UpdateError:
+    cause = ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'UpdateItem')
+    return UpdateError('Failed to update item', cause=cause)
+
+
+def claim(repository: GenerationJobsRepository, request_id: str = 'm1') -> GenerationJob:
+    _, job, _ = repository.claim_job(event_id='event-1', request_id=request_id, lease_seconds=600)
+    return job
+
+
+def test_claim_without_request_id_gets_its_own_owner(save):
+    repository = GenerationJobsRepository()
+
+    first_job = claim(repository, request_id=None)
+    second_job = claim(repository, request_id=None)
+
+    assert first_job.requestId and second_job.requestId
+    assert first_job.requestId != second_job.requestId
+
+
+def test_progress_update_renews_lease_and_is_conditional_on_owner(mocker, save, update):
+    repository = GenerationJobsRepository()
+    job = claim(repository)
+    mocker.patch('time.time', return_value=1000.0)
+
+    status, _, _ = repository.update_progress(job_entry=job, rendered=25, lease_seconds=600)
+
+    assert status == HTTPStatus.OK
+    _, kwargs = update.call_args
+    assert str(GenerationJob.leaseExpiresAt.set(1600)) in [str(action) for action in kwargs['actions']]
+    assert str(kwargs['condition']) == "requestId = {'S': 'm1'}"
+
+
+def test_final_update_is_conditional_on_owner_without_renewing_lease(save, update):
+    repository = GenerationJobsRepository()
+    job = claim(repository)
+
+    repository.update_progress(job_entry=job, job_status=GenerationJobStatus.COMPLETED)
+
+    _, kwargs = update.call_args
+    assert not any('leaseExpiresAt' in str(action) for action in kwargs['actions'])
+    assert str(kwargs['condition']) == "requestId = {'S': 'm1'}"
+
+
+def test_progress_update_of_taken_over_job_is_a_conflict(save, update):
+    repository = GenerationJobsRepository()
+    job = claim(repository)
+    update.side_effect = conditional_check_failed()
+
+    status, job_entry, message = repository.update_progress(job_entry=job, rendered=25, lease_seconds=600)
+
+    assert status == HTTPStatus.CONFLICT
+    assert job_entry is None
+    assert 'taken over' in message
@@ -0,0 +1,133 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+try:
+    import handler
+except OSError as e:  # WeasyPrint loads the system pango/cairo libraries on import
+    pytest.skip(f'WeasyPrint system libraries are missing: {e}', allow_module_level=True)
+
+from constants.queue_constants import QueueLane
+
+BULK_QUEUE_ARN = 'arn:aws:sqs:ap-southeast-1:000000000000:test-certificate-queue.fifo'
+CLAIM_QUEUE_ARN = 'arn:aws:sqs:ap-southeast-1:000000000000:test-certificate-claim-queue.fifo'
+
+
+def sqs_record(
+    message_id: str,
+    event_id: str,
+    registration_id: str = None,
+    queue_arn: str = CLAIM_QUEUE_ARN,
+    group_id: str = None,
+):
+    record = {
+        'messageId': message_id,
+        'eventSourceARN': queue_arn,
+        'body': json.dumps({'eventId': event_id, 'registrationId': registration_id}),
+    }
+    if group_id:
+        record['attributes'] = {'MessageGroupId': group_id}
+    return record
+
+
+@pytest.fixture
+def usecase(mocker):
+    usecase = MagicMock()
+    usecase.generate_certficates.return_value = True
+    mocker.patch.object(handler, 'CertificateUsecase', return_value=usecase)
+    mocker.patch.object(handler, 'emit_rate_metrics')
+    return usecase
+
+
+def test_reports_no_failures_when_every_message_is_handled(usecase):
+    records = [sqs_record('m1', 'event-1', 'reg-1'), sqs_record('m2', 'event-1', 'reg-2')]
+
+    response = handler.generate_certificate_handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': []}
+    assert usecase.generate_certficates.call_count == 2
+
+
+def test_reports_failed_message_and_every_later_message_of_its_group(usecase):
+    usecase.generate_certficates.side_effect = [True, False, True]
+    records = [
+        sqs_record('m1', 'event-1', 'reg-1', group_id='group-1'),
+        sqs_record('m2', 'event-1', 'reg-2', group_id='group-1'),
+        sqs_record('m3', 'event-2', 'reg-3', group_id='group-1'),
+    ]
+
+    response = handler.generate_certificate_handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm2'}, {'itemIdentifier': 'm3'}]}
+    # FIFO ordering: nothing after the first failure is attempted
+    assert usecase.generate_certficates.call_count == 2
+
+
+def test_failure_does_not_hold_back_other_groups(usecase):
+    usecase.generate_certficates.side_effect = [False, True, True]
+    records = [
+        sqs_record('m1', 'event-1', 'reg-1', group_id='reg-1'),
+        sqs_record('m2', 'event-1', 'reg-2', group_id='reg-2'),
+        sqs_record('m3', 'event-2', 'reg-3', group_id='reg-3'),
+    ]
+
+    response = handler.generate_certificate_handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+    assert usecase.generate_certficates.call_count == 3
+
+
+def test_reports_every_message_when_time_budget_is_exhausted(usecase):
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 1000
+    records = [sqs_record('m1', 'event-1', 'reg-1'), sqs_record('m2', 'event-1', 'reg-2')]
+
+    response = handler.generate_certificate_handler({'Records': records}, context)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}, {'itemIdentifier': 'm2'}]}
+    usecase.generate_certficates.assert_not_called()
+
+
+def test_event_wide_request_supersedes_single_requests(usecase):
+    records = [
+        sqs_record('m1', 'event-1', 'reg-1', queue_arn=BULK_QUEUE_ARN),
+        sqs_record('m2', 'event-1', None, queue_arn=BULK_QUEUE_ARN),
+        sqs_record('m3', 'event-1', 'reg-1', queue_arn=BULK_QUEUE_ARN),
+    ]
+
+    response = handler.generate_certificate_handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': []}
+    usecase.generate_certficates.assert_called_once()
+    assert usecase.generate_certficates.call_args.kwargs['registration_id'] is None
+    assert usecase.generate_certficates.call_args.kwargs['request_id'] == 'm2'
+
+
+def test_get_lane_detects_queue():
+    assert handler.get_lane([sqs_record('m1', 'event-1', 'reg-1')]) == QueueLane.CLAIM
+    assert handler.get_lane([sqs_record('m1', 'event-1', None, queue_arn=BULK_QUEUE_ARN)]) == QueueLane.BULK
+
+
+def test_get_certificates_handler_flushes_logs(mocker, usecase):
+    usecase.get_certificates.return_value = handler.HTTPStatus.OK, [], None
+    emit = mocker.patch.object(handler.log_summary, 'emit')
+    flush_logs = mocker.patch.object(handler, 'flush_logs')
+
+    response = handler.get_certificates_handler({'pathParameters': {'eventId': 'event-1'}}, None)
+
+    assert response['statusCode'] == 200
+    emit.assert_called_once()
+    flush_logs.assert_called_once()
+
+
+def test_get_generation_jobs_handler_flushes_logs(mocker, usecase):
+    usecase.get_generation_jobs.return_value = handler.HTTPStatus.NOT_FOUND, None, 'No generation jobs found'
+    emit = mocker.patch.object(handler.log_summary, 'emit')
+    flush_logs = mocker.patch.object(handler, 'flush_logs')
+
+    response = handler.get_generation_jobs_handler({'pathParameters': {'eventId': 'event-1'}}, None)
+
+    assert response['statusCode'] == 404
+    emit.assert_called_once()
+    flush_logs.assert_called_once()
@@ -0,0 +1,83 @@
+import pytest
+
+from utils.memory_budget import MemoryBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def budget(mocker, clock):
+    budget = MemoryBudget(memory_budget_mb=1000, tmp_budget_mb=1000, release_interval_seconds=30, clock=clock)
+    mocker.patch.object(budget, 'tmp_mb', return_value=100)
+    mocker.patch('utils.memory_budget.gc.collect')
+    mocker.patch('utils.memory_budget.fitz.TOOLS.store_shrink')
+    return budget
+
+
+def rss(mocker, budget: MemoryBudget, *values: float):
+    return mocker.patch.object(budget, 'rss_mb', side_effect=list(values))
+
+
+def test_within_budget_without_release_below_threshold(mocker, budget):
+    rss(mocker, budget, 500)
+    release = mocker.spy(budget, 'release')
+
+    assert budget.within_budget() is True
+    release.assert_not_called()
+
+
+def test_release_near_budget_is_rate_limited(mocker, budget, clock):
+    rss(mocker, budget, 950, 920, 950, 950, 920)
+    release = mocker.spy(budget, 'release')
+
+    assert budget.within_budget() is True
+    clock.now = 10
+    assert budget.within_budget() is True
+    assert release.call_count == 1
+
+    clock.now = 30
+    assert budget.within_budget() is True
+    assert release.call_count == 2
+
+
+def test_over_budget_after_release_ends_the_run(mocker, budget):
+    rss(mocker, budget, 1100, 1050)
+
+    assert budget.within_budget() is False
+
+
+def test_over_budget_shortly_after_release_ends_the_run(mocker, budget, clock):
+    rss(mocker, budget, 950, 900, 1010)
+    release = mocker.spy(budget, 'release')
+
+    assert budget.within_budget() is True
+    clock.now = 5
+    assert budget.within_budget() is False
+    assert release.call_count == 1
+
+
+def test_release_brings_rss_back_within_budget(mocker, budget):
+    rss(mocker, budget, 1100, 800)
+
+    assert budget.within_budget() is True
+
+
+def test_chunk_size_follows_tmp_usage(mocker, budget):
+    mocker.patch.object(budget, 'rss_mb', return_value=100)
+    initial_chunk_size = budget.chunk_size
+
+    assert budget.next_chunk_size() == initial_chunk_size * 2
+
+    budget.tmp_mb.return_value = 950
+    assert budget.next_chunk_size() == initial_chunk_size
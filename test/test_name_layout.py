@@ -0,0 +1,39 @@
+import os
+
+from PIL import ImageFont
+
+from constants.certificate_constants import CertificateConstants
+from template.get_template import NAME_FONT_PATH, html_template, name_font_url
+from usecase.name_layout import NameLayout
+
+
+def test_shipped_font_is_an_absolute_path():
+    assert os.path.isabs(NAME_FONT_PATH)
+    assert os.path.isfile(NAME_FONT_PATH)
+    assert name_font_url() == 'file://' + NAME_FONT_PATH
+
+
+def test_template_renders_names_with_the_shipped_font():
+    template = html_template()
+
+    assert "src: url('{{name_font_url}}')" in template
+    assert "font-family: 'CertificateName'" in template
+
+
+def test_short_name_keeps_the_full_font_size(mocker):
+    warning = mocker.patch('usecase.name_layout.logger.warning')
+    layout = NameLayout()
+
+    assert layout.font_size('Ana Cruz') == CertificateConstants.NAME_FONT_SIZE
+    warning.assert_not_called()
+
+
+def test_long_name_is_shrunk_to_fit():
+    layout = NameLayout()
+    name = 'Maria Concepcion Dela Cruz Santos Villanueva Fernandez'
+
+    font_size = layout.font_size(name)
+
+    assert CertificateConstants.NAME_MIN_FONT_SIZE <= font_size < CertificateConstants.NAME_FONT_SIZE
+    font = ImageFont.truetype(NAME_FONT_PATH, font_size)
+    assert font.getlength(name) <= layout.max_width
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from model.generation_jobs.generation_job import GenerationJob
+from s3.data_store import S3DataStore
+from utils.rate_controller import AdaptiveRateController, is_throttle_error
+
+
+class FakeTime:
+    """A clock whose sleeps advance it instantly, recording every delay."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def client_error(code: str, status_code: int = 400) -> ClientError:
+    return ClientError({'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status_code}}, 'Operation')
+
+
+@pytest.fixture
+def fake_time(mocker):
+    # Make the jittered backoff deterministic: always sleep the full delay
+    mocker.patch('utils.rate_controller.random.uniform', side_effect=lambda low, high: high)
+    return FakeTime()
+
+
+def controller(fake_time: FakeTime, **kwargs) -> AdaptiveRateController:
+    return AdaptiveRateController(name='test', clock=fake_time.clock, sleep=fake_time.sleep, **kwargs)
+
+
+@pytest.mark.parametrize(
+    'error',
+    [
+        client_error('ProvisionedThroughputExceededException'),
+        client_error('ThrottlingException'),
+        client_error('SlowDown', status_code=503),
+        client_error('ServiceUnavailable', status_code=503),
+    ],
+)
+def test_is_throttle_error_detects_throttling(error):
+    assert is_throttle_error(error)
+
+
+def test_is_throttle_error_follows_cause():
+    try:
+        try:
+            raise client_error('ThrottlingException')
+        except ClientError as cause:
+            raise RuntimeError('Failed to update') from cause
+    except RuntimeError as error:
+        assert is_throttle_error(error)
+
+
+def test_is_throttle_error_ignores_other_errors():
+    assert not is_throttle_error(client_error('ConditionalCheckFailedException'))
+    assert not is_throttle_error(ValueError('invalid'))
+
+
+def test_retries_throttled_call_with_exponential_backoff(fake_time):
+    rate_controller = controller(fake_time, initial_rate=1000, base_delay=0.1)
+    responses = [client_error('ThrottlingException'), client_error('ThrottlingException'), 'ok']
+
+    def backend():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert rate_controller.call(backend) == 'ok'
+    backoffs = [seconds for seconds in fake_time.sleeps if seconds in (0.1, 0.2)]
+    assert backoffs == [0.1, 0.2]
+
+
+def test_raises_after_max_retries(fake_time):
+    rate_controller = controller(fake_time, max_retries=2)
+    calls = []
+
+    def backend():
+        calls.append(1)
+        raise client_error('SlowDown', status_code=503)
+
+    with pytest.raises(ClientError):
+        rate_controller.call(backend)
+    assert len(calls) == 3
+
+
+def test_raises_other_errors_without_retry(fake_time):
+    rate_controller = controller(fake_time)
+    calls = []
+
+    def backend():
+        calls.append(1)
+        raise client_error('ConditionalCheckFailedException')
+
+    with pytest.raises(ClientError):
+        rate_controller.call(backend)
+    assert len(calls) == 1
+    assert fake_time.sleeps == []
+
+
+def test_throttle_halves_rate_and_success_raises_it(fake_time):
+    rate_controller = controller(fake_time, initial_rate=40, increase=10, max_retries=0)
+
+    with pytest.raises(ClientError):
+        rate_controller.call(lambda: (_ for _ in ()).throw(client_error('ThrottlingException')))
+    assert rate_controller.current_rate == 20
+
+    rate_controller.call(lambda: None)
+    assert rate_controller.current_rate == pytest.approx(20.5)
+
+
+def test_rate_is_bounded(fake_time):
+    rate_controller = controller(fake_time, initial_rate=2, min_rate=1, max_rate=3, max_retries=0)
+
+    for _ in range(100):
+        rate_controller.call(lambda: None)
+    assert rate_controller.current_rate == 3
+
+    for _ in range(5):
+        with pytest.raises(ClientError):
+            rate_controller.call(lambda: (_ for _ in ()).throw(client_error('ThrottlingException')))
+    assert rate_controller.current_rate == 1
+
+
+def test_paces_sequential_calls(fake_time):
+    rate_controller = controller(fake_time, initial_rate=10, increase=0)
+
+    for _ in range(21):
+        rate_controller.call(lambda: None)
+
+    # The first call uses the initial token, the other 20 are paced at 10 calls per second
+    assert fake_time.now == pytest.approx(2.0)
+
+
+def test_emit_metrics_writes_embedded_metric(fake_time, capsys):
+    rate_controller = controller(fake_time, initial_rate=10, increase=0)
+    for _ in range(11):
+        rate_controller.call(lambda: None)
+
+    rate_controller.emit_metrics()
+
+    metric = json.loads(capsys.readouterr().out)
+    assert metric['Backend'] == 'test'
+    assert metric['RateLimit'] == 10
+    assert metric['Throughput'] == pytest.approx(11)
+    assert metric['Throttles'] == 0
+    assert metric['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'SparcsCertificateService'
+
+
+def test_dynamodb_throttle_reaches_the_rate_controller_without_sdk_retries(mocker):
+    body = {'__type': 'com.amazonaws.dynamodb.v20120810#ProvisionedThroughputExceededException', 'message': 'Slow down'}
+    response = mocker.Mock(status_code=400, headers={}, content=json.dumps(body).encode('utf-8'))
+    send = mocker.patch('botocore.httpsession.URLLib3Session.send', return_value=response)
+
+    with pytest.raises(Exception) as error:
+        GenerationJob.get('GenerationJob#event-1', 'ALL')
+
+    assert send.call_count == 1
+    assert is_throttle_error(error.value)
+
+
+def test_s3_client_does_not_retry_throttles():
+    s3_client = S3DataStore()._S3DataStore__s3_client
+
+    assert s3_client.meta.config.retries['total_max_attempts'] == 1
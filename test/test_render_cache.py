@@ -0,0 +1,134 @@
+from typing import Dict, Set
+
+from constants.certificate_constants import CertificateConstants
+from usecase.render_cache import RenderCache
+
+
+class FakeDataStore:
+    """An in-memory S3 data store holding the render digest metadata of each object."""
+
+    def __init__(self):
+        self.bucket_name = 'test-bucket'
+        self.objects: Dict[str, dict] = {}
+        self.failing_copies: Set[str] = set()
+        self.copies = []
+
+    def put(self, object_key: str, digest: str) -> None:
+        self.objects[object_key] = {CertificateConstants.RENDER_DIGEST_METADATA_KEY: digest}
+
+    def get_file_metadata(self, object_key: str) -> dict:
+        if object_key not in self.objects:
+            return None
+        return {'Metadata': dict(self.objects[object_key])}
+
+    def copy_object(self, src_bucket, src_key, target_key) -> bool:
+        self.copies.append((src_key, target_key))
+        if src_key in self.failing_copies or src_key not in self.objects:
+            return False
+        self.objects[target_key] = dict(self.objects[src_key])
+        return True
+
+
+def render_cache(data_store: FakeDataStore, template_etag: str = '"etag"') -> RenderCache:
+    return RenderCache(s3_data_store=data_store, template_etag=template_etag, settings_fingerprint='settings')
+
+
+def test_digest_depends_on_fields_template_and_settings():
+    data_store = FakeDataStore()
+    cache = render_cache(data_store)
+
+    digest = cache.digest({'name': 'Ana Cruz', 'fontSize': 48})
+
+    assert digest == render_cache(data_store).digest({'fontSize': 48, 'name': 'Ana Cruz'})
+    assert digest != cache.digest({'name': 'Ana Cruz', 'fontSize': 40})
+    assert digest != render_cache(data_store, template_etag='"other"').digest({'name': 'Ana Cruz', 'fontSize': 48})
+
+
+def test_disabled_without_template_etag():
+    data_store = FakeDataStore()
+    data_store.put('a.pdf', 'digest')
+    data_store.put('a.png', 'digest')
+    cache = render_cache(data_store, template_etag=None)
+
+    assert cache.resolve('digest', 'a.pdf', 'a.png') is False
+
+
+def test_miss_when_nothing_is_stored():
+    data_store = FakeDataStore()
+    cache = render_cache(data_store)
+
+    assert cache.resolve('digest', 'a.pdf', 'a.png', candidates=[(None, None)]) is False
+    assert data_store.copies == []
+
+
+def test_hit_on_existing_target_without_copy():
+    data_store = FakeDataStore()
+    data_store.put('a.pdf', 'digest')
+    data_store.put('a.png', 'digest')
+    cache = render_cache(data_store)
+
+    assert cache.resolve('digest', 'a.pdf', 'a.png') is True
+    assert data_store.copies == []
+
+
+def test_same_run_render_is_copied_to_new_target():
+    data_store = FakeDataStore()
+    data_store.put('a.pdf', 'digest')
+    data_store.put('a.png', 'digest')
+    cache = render_cache(data_store)
+    cache.remember('digest', 'a.pdf', 'a.png')
+
+    assert cache.resolve('digest', 'b.pdf', 'b.png') is True
+    assert data_store.copies == [('a.pdf', 'b.pdf'), ('a.png', 'b.png')]
+    assert data_store.objects['b.pdf'] == data_store.objects['a.pdf']
+
+
+def test_candidate_from_earlier_run_is_copied_to_new_target():
+    data_store = FakeDataStore()
+    data_store.put('old.pdf', 'digest')
+    data_store.put('old.png', 'digest')
+    cache = render_cache(data_store)
+
+    assert cache.resolve('digest', 'new.pdf', 'new.png', candidates=[('old.pdf', 'old.png')]) is True
+    assert data_store.copies == [('old.pdf', 'new.pdf'), ('old.png', 'new.png')]
+
+
+def test_stale_target_and_candidate_are_not_reused():
+    # e.g. an attendee whose name changed, or another attendee sharing a legacy key
+    data_store = FakeDataStore()
+    data_store.put('a.pdf', 'other-digest')
+    data_store.put('a.png', 'other-digest')
+    data_store.put('old.pdf', 'digest')
+    data_store.put('old.png', 'other-digest')
+    cache = render_cache(data_store)
+
+    assert cache.resolve('digest', 'a.pdf', 'a.png', candidates=[('old.pdf', 'old.png')]) is False
+    assert data_store.copies == []
+
+
+def test_failed_copy_falls_through_to_render():
+    data_store = FakeDataStore()
+    data_store.put('a.pdf', 'digest')
+    data_store.put('a.png', 'digest')
+    data_store.failing_copies.add('a.png')
+    cache = render_cache(data_store)
+    cache.remember('digest', 'a.pdf', 'a.png')
+
+    assert cache.resolve('digest', 'b.pdf', 'b.png') is False
+    # A later resolve of the same target must not treat the half-copied pair as a hit
+    data_store.failing_copies.clear()
+    data_store.objects.pop('a.pdf')
+    data_store.objects.pop('a.png')
+    assert cache.resolve('digest', 'b.pdf', 'b.png') is False
+
+
+def test_failed_copy_tries_the_next_source():
+    data_store = FakeDataStore()
+    for object_key in ('a.pdf', 'a.png', 'old.pdf', 'old.png'):
+        data_store.put(object_key, 'digest')
+    data_store.failing_copies.add('a.pdf')
+    cache = render_cache(data_store)
+    cache.remember('digest', 'a.pdf', 'a.png')
+
+    assert cache.resolve('digest', 'b.pdf', 'b.png', candidates=[('old.pdf', 'old.png')]) is True
+    assert data_store.copies[-2:] == [('old.pdf', 'b.pdf'), ('old.png', 'b.png')]
@@ -0,0 +1,134 @@
+from pynamodb.attributes import MapAttribute, NumberAttribute, UnicodeAttribute
+from pynamodb.expressions.update import RemoveAction, SetAction
+from pynamodb.models import Model
+
+from repository.repository_utils import RepositoryUtils
+
+
+class Profile(Model):
+    class Meta:
+        table_name = 'test-profiles'
+        region = 'ap-southeast-1'
+
+    hashKey = UnicodeAttribute(hash_key=True)
+    name = UnicodeAttribute(null=True)
+    age = NumberAttribute(null=True)
+    updateDate = UnicodeAttribute(null=True)
+    details = MapAttribute(null=True)
+
+
+def describe(actions):
+    """Reduce update actions to (action type, attribute path, serialized value) triples."""
+    described = []
+    for action in actions:
+        path = str(action.values[0])
+        value = str(action.values[1]).split(' = ', 1)[-1] if isinstance(action, SetAction) else None
+        described.append((type(action).__name__, path, value))
+    return described
+
+
+def test_unchanged_value_has_no_action():
+    profile = Profile(hashKey='profile-1', name='Juan', age=30, details={'city': 'Manila'})
+
+    actions = RepositoryUtils.get_update_actions(
+        model=profile, new_data={'name': 'Juan', 'age': 30, 'details': {'city': 'Manila'}}
+    )
+
+    assert actions == []
+
+
+def test_changed_value_is_set():
+    profile = Profile(hashKey='profile-1', name='Juan', age=30)
+
+    actions = RepositoryUtils.get_update_actions(model=profile, new_data={'name': 'Maria', 'age': 30})
+
+    assert describe(actions) == [('SetAction', 'name', "{'S': 'Maria'}")]
+
+
+def test_none_removes_existing_value():
+    profile = Profile(hashKey='profile-1', name='Juan', age=30)
+
+    actions = RepositoryUtils.get_update_actions(model=profile, new_data={'name': None, 'age': None})
+
+    assert [type(action) for action in actions] == [RemoveAction, RemoveAction]
+    assert [str(action.values[0]) for action in actions] == ['name', 'age']
+
+
+def test_none_on_missing_value_has_no_action():
+    profile = Profile(hashKey='profile-1')
+
+    actions = RepositoryUtils.get_update_actions(model=profile, new_data={'name': None})
+
+    assert actions == []
+
+
+def test_existing_map_is_updated_per_key():
+    profile = Profile(hashKey='profile-1', details={'city': 'Manila', 'zip': '1000', 'country': 'PH'})
+
+    actions = RepositoryUtils.get_update_actions(
+        model=profile, new_data={'details': {'city': 'Cebu', 'zip': None, 'country': 'PH'}}
+    )
+
+    assert describe(actions) == [
+        ('SetAction', 'details.city', "{'S': 'Cebu'}"),
+        ('RemoveAction', 'details.zip', None),
+    ]
+
+
+def test_missing_map_is_written_whole():
+    profile = Profile(hashKey='profile-1')
+
+    actions = RepositoryUtils.get_update_actions(
+        model=profile, new_data={'details': {'city': 'Cebu', 'address': {'street': 'Osmena'}}}
+    )
+
+    assert len(actions) == 1
+    assert isinstance(actions[0], SetAction)
+    assert str(actions[0].values[0]) == 'details'
+    assert actions[0].values[1].value == {'M': {'city': {'S': 'Cebu'}, 'address': {'M': {'street': {'S': 'Osmena'}}}}}
+
+
+def test_missing_nested_map_is_written_whole():
+    profile = Profile(hashKey='profile-1', details={'city': 'Manila'})
+
+    actions = RepositoryUtils.get_update_actions(model=profile, new_data={'details': {'address': {'street': 'Osmena'}}})
+
+    assert describe(actions) == [('SetAction', 'details.address', "{'M': {'street': {'S': 'Osmena'}}}")]
+
+
+def test_matches_update_nested_dict_semantics():
+    old_details = {'city': 'Manila', 'zip': '1000', 'address': {'street': 'Rizal'}}
+    new_details = {'city': 'Cebu', 'zip': None, 'address': {'street': 'Osmena', 'unit': '2B'}}
+    profile = Profile(hashKey='profile-1', details=dict(old_details, address=dict(old_details['address'])))
+
+    actions = RepositoryUtils.get_update_actions(model=profile, new_data={'details': new_details})
+
+    # Applying the actions to the old map gives the same result as the legacy dict merge
+    merged = RepositoryUtils.update_nested_dict(dict(old_details, address=dict(old_details['address'])), new_details)
+    applied = dict(old_details, address=dict(old_details['address']))
+    for action_type, path, _ in describe(actions):
+        keys = path.split('.')[1:]
+        parent = applied
+        for key in keys[:-1]:
+            parent = parent[key]
+        if action_type == 'RemoveAction':
+            del parent[keys[-1]]
+        else:
+            value = new_details
+            for key in keys:
+                value = value[key]
+            parent[keys[-1]] = value
+
+    # The legacy merge keeps null values, which DynamoDB does not store and REMOVE drops
+    merged = {key: val for key, val in merged.items() if val is not None}
+    assert applied == merged
+
+
+def test_ignores_unknown_and_excluded_keys():
+    profile = Profile(hashKey='profile-1', updateDate='2024-01-01')
+
+    actions = RepositoryUtils.get_update_actions(
+        model=profile, new_data={'unknown': 'value', 'updateDate': '2024-02-01'}
+    )
+
+    assert actions == []
@@ -0,0 +1,75 @@
+import pytest
+
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_get_returns_value_before_expiry(clock):
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set('event', 'value')
+
+    clock.now = 9.9
+    assert cache.get('event') == 'value'
+    assert 'event' in cache
+
+
+def test_get_drops_expired_entry(clock):
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set('event', 'value')
+
+    clock.now = 10
+    assert cache.get('event', default='missing') == 'missing'
+    assert len(cache) == 0
+
+
+def test_set_ttl_overrides_default(clock):
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set('short', 'value', ttl=1)
+    cache.set('long', 'value')
+
+    clock.now = 5
+    assert 'short' not in cache
+    assert 'long' in cache
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set('first', 1)
+    cache.set('second', 2)
+    cache.get('first')
+    cache.set('third', 3)
+
+    assert 'second' not in cache
+    assert cache.get('first') == 1
+    assert cache.get('third') == 3
+
+
+def test_zero_max_size_disables_cache(clock):
+    cache = TTLCache(max_size=0, ttl=10, clock=clock)
+    cache.set('event', 'value')
+
+    assert cache.get('event') is None
+
+
+def test_pop_and_clear(clock):
+    cache = TTLCache(max_size=4, ttl=10, clock=clock)
+    cache.set('first', 1)
+    cache.set('second', 2)
+
+    assert cache.pop('first') == 1
+    assert cache.pop('first', default='missing') == 'missing'
+
+    cache.clear()
+    assert len(cache) == 0
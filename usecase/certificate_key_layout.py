@@ -0,0 +1,58 @@
+import hashlib
+import os
+from typing import Tuple
+
+from constants.certificate_constants import (
+    CertificateConstants,
+    CertificateKeyLayoutType,
+)
+from model.registrations.registration import Registration
+
+
+class CertificateKeyLayout:
+    """
+    Builds the S3 object keys of rendered certificates.
+
+    The ``legacy`` layout keys certificates by attendee name:
+        certificates/<eventId>/<name>/<eventId>_<name>.pdf
+
+    The ``registration`` layout keys certificates by registration ID, optionally behind a hash shard so that
+    parallel uploads spread over many S3 prefixes:
+        certificates/[<shard>/]<eventId>/<registrationId>.pdf
+
+    Attributes:
+        layout (CertificateKeyLayoutType): The key layout in use.
+        shard_width (int): The number of hex characters of the shard component, 0 to disable sharding.
+    """
+
+    def __init__(self, layout: str = None, shard_width: int = None):
+        self.layout = CertificateKeyLayoutType(
+            layout or os.getenv('CERTIFICATE_KEY_LAYOUT', CertificateKeyLayoutType.LEGACY.value)
+        )
+        self.shard_width = int(os.getenv('CERTIFICATE_KEY_SHARD_WIDTH', '0')) if shard_width is None else shard_width
+
+    def object_keys(self, event_id: str, registration: Registration) -> Tuple[str, str]:
+        """
+        Get the object keys of a registration's certificate.
+
+        Args:
+            event_id (str): The event ID.
+            registration (Registration): The registration entry.
+
+        Returns:
+            Tuple[str, str]: The PDF and PNG object keys.
+        """
+        prefix = self.object_prefix(event_id=event_id, registration=registration)
+        return f'{prefix}.pdf', f'{prefix}.png'
+
+    def object_prefix(self, event_id: str, registration: Registration) -> str:
+        if self.layout == CertificateKeyLayoutType.LEGACY:
+            name = f'{registration.firstName} {registration.lastName}'
+            return f'{CertificateConstants.CERTIFICATES_PREFIX}/{event_id}/{name}/{event_id}_{name}'
+
+        registration_id = registration.registrationId
+        if not self.shard_width:
+            return f'{CertificateConstants.CERTIFICATES_PREFIX}/{event_id}/{registration_id}'
+
+        shard = hashlib.md5(registration_id.encode('utf-8')).hexdigest()[: self.shard_width]
+        return f'{CertificateConstants.CERTIFICATES_PREFIX}/{shard}/{event_id}/{registration_id}'
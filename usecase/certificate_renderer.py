@@ -0,0 +1,109 @@
+import hashlib
+import os
+from typing import NamedTuple, Optional
+
+import fitz
+import jinja2
+import numpy as np
+import weasyprint
+from weasyprint import CSS
+
+from constants.certificate_constants import CertificateConstants
+from template.get_template import html_template, name_font_url
+
+
+class RenderedCertificate(NamedTuple):
+    pdf_path: str
+    image_path: Optional[str]
+    thumbnail: Optional[np.ndarray] = None
+
+
+class CertificateRenderer:
+    """
+    Renders certificate PDFs and PNGs from a local template image.
+
+    Attributes:
+        template_img_path (str): The local path of the certificate template image.
+        work_dir (str): The directory where rendered files are written.
+        zoom (int): The scale of the PNG raster relative to the PDF page.
+        settings_fingerprint (str): A hash of the render settings, used as part of the render cache key.
+    """
+
+    def __init__(self, template_img_path: str, work_dir: str, zoom: int = CertificateConstants.ZOOM):
+        self.template_img_path = template_img_path
+        self.work_dir = work_dir
+        self.zoom = zoom
+        template = html_template()
+        self.__html_template = jinja2.Environment().from_string(template)
+        self.__stylesheets = [CSS(string=CertificateConstants.PAGE_CSS)]
+
+        # A hash of every render setting that affects the output bytes
+        settings = '\n'.join((template, CertificateConstants.PAGE_CSS, CertificateConstants.NAME_FONT, str(self.zoom)))
+        self.settings_fingerprint = hashlib.sha256(settings.encode('utf-8')).hexdigest()
+
+    def generate_certificate_html(self, name: str, font_size: int = CertificateConstants.NAME_FONT_SIZE) -> str:
+        return self.__html_template.render(
+            template_img=self.template_img_path, name_font_url=name_font_url(), name=name, font_size=font_size
+        )
+
+    def render(
+        self,
+        name: str,
+        certificate_name: str,
+        font_size: int = CertificateConstants.NAME_FONT_SIZE,
+        thumbnail_width: int = None,
+        with_image: bool = True,
+    ) -> RenderedCertificate:
+        """
+        Render the certificate of one attendee.
+
+        Args:
+            name (str): The name printed on the certificate.
+            certificate_name (str): The base file name of the rendered files.
+            font_size (int, optional): The font size of the name in CSS pixels, as fitted by NameLayout.
+            thumbnail_width (int, optional): The width of a reduced-resolution RGB raster to return alongside the
+                files (default is None for no thumbnail).
+            with_image (bool, optional): Whether the PNG is rasterized (default is True). Without it, the image
+                path is None.
+
+        Returns:
+            RenderedCertificate: The local paths of the rendered PDF and PNG, and the optional thumbnail.
+        """
+        # Generate Certificate HTML-----------------------------------------------------------------------------------
+        html_path = os.path.join(self.work_dir, CertificateConstants.HTML_FILENAME)
+        with open(html_path, 'w') as file:
+            file.write(self.generate_certificate_html(name=name, font_size=font_size))
+
+        # Convert HTML to PDF-----------------------------------------------------------------------------------------
+        certificate_path = os.path.join(self.work_dir, f'{certificate_name}.pdf')
+        weasyprint.HTML(html_path).write_pdf(certificate_path, stylesheets=self.__stylesheets)
+
+        # Get only the first page of the PDF--------------------------------------------------------------------------
+        # Every document and pixmap is released as soon as it is used so that long runs do not accumulate them
+        image_path = os.path.join(self.work_dir, f'{certificate_name}.png') if with_image else None
+        thumbnail = None
+        with fitz.open() as doc_first_page:
+            with fitz.open(certificate_path) as certificate_doc:
+                doc_first_page.insert_pdf(certificate_doc, from_page=0, to_page=0)
+
+            first_page = doc_first_page.load_page(0)
+
+            # Save the image------------------------------------------------------------------------------------------
+            if with_image:
+                pix = first_page.get_pixmap(matrix=fitz.Matrix(self.zoom, self.zoom))
+                pix.save(image_path)
+                del pix
+
+            if thumbnail_width:
+                thumbnail_zoom = thumbnail_width / first_page.rect.width
+                thumbnail_pix = first_page.get_pixmap(matrix=fitz.Matrix(thumbnail_zoom, thumbnail_zoom), alpha=False)
+                thumbnail = np.frombuffer(thumbnail_pix.samples, dtype=np.uint8).reshape(
+                    thumbnail_pix.height, thumbnail_pix.width, thumbnail_pix.n
+                )
+                del thumbnail_pix
+
+            # Save the new PDF
+            del first_page
+            doc_first_page.save(certificate_path)
+
+        return RenderedCertificate(pdf_path=certificate_path, image_path=image_path, thumbnail=thumbnail)
@@ -1,18 +1,34 @@
+import hashlib
 import os
 import tempfile
+import time
+from collections import Counter
+from datetime import datetime
 from http import HTTPStatus
+from typing import List, Tuple
 
-import fitz
-import jinja2
-import weasyprint
-from weasyprint import CSS
-
-from model.registrations.registration import RegistrationIn
+from constants.certificate_constants import CertificateConstants
+from model.certificates.certificate import CertificateOut
+from model.generation_jobs.generation_job import GenerationJobOut
+from model.generation_jobs.generation_jobs_constants import GenerationJobStatus
+from model.registrations.registration import Registration, RegistrationIn
 from repository.events_repository import EventsRepository
+from repository.generation_jobs_repository import GenerationJobsRepository
 from repository.registrations_repository import RegistrationsRepository
 from s3.data_store import S3DataStore
-from template.get_template import html_template
-from utils.logger import logger
+from s3.exceptions import PdfServiceInternalError
+from usecase.certificate_key_layout import CertificateKeyLayout
+from usecase.certificate_renderer import CertificateRenderer
+from usecase.contact_sheet import ContactSheetBuilder
+from usecase.name_layout import NameLayout
+from usecase.render_cache import RenderCache
+from utils.logger import SAMPLED, log_summary, logger
+from utils.memory_budget import MemoryBudget
+
+TEMPLATE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'certificate-templates')
+JOB_LEASE_SECONDS = int(os.getenv('GENERATION_JOB_LEASE_SECONDS', '600'))
+JOB_PROGRESS_INTERVAL = int(os.getenv('GENERATION_JOB_PROGRESS_INTERVAL', '25'))
+CONTACT_SHEET_ENABLED = os.getenv('CONTACT_SHEET_ENABLED', 'true').lower() == 'true'
 
 
 class CertificateUsecase:
@@ -20,23 +36,54 @@ class CertificateUsecase:
         self.__s3_data_store = S3DataStore()
         self.__registrations_repository = RegistrationsRepository()
         self.__events_repository = EventsRepository()
+        self.__generation_jobs_repository = GenerationJobsRepository()
+        self.__key_layout = CertificateKeyLayout()
+        self.__name_layout = NameLayout()
+
+    def generate_certficates(
+        self, event_id: str, registration_id: str = None, request_id: str = None, deadline: float = None
+    ) -> bool:
+        """
+        Generate the certificates of an event, or of a single registration.
 
-    def generate_certificate_html(self, template_img: str, name: str):
-        j2 = jinja2.Environment()
-        template = html_template()
-        htmlTemplate = j2.from_string(template)
-        return htmlTemplate.render(template_img=template_img, name=name)
+        Args:
+            event_id (str): The event ID.
+            registration_id (str, optional): The registration ID (default is None for every registration).
+            request_id (str, optional): The ID of the request, e.g. the SQS message ID, used to reject duplicates.
+            deadline (float, optional): A time.monotonic() value after which no new certificate is started.
 
-    def generate_certficates(self, event_id: str, registration_id: str = None):
-        logger.info(f"Generating certificates for event: {event_id}")
+        Returns:
+            bool: False if the request should be retried, i.e. it was interrupted by the deadline or the memory
+            budget, its job could not be claimed, or its own earlier run of the job crashed, otherwise True. A run
+            whose job was taken over by another request stops early and returns True, since that request finishes
+            the job.
+        """
+        logger.info('Generating certificates for event: %s', event_id)
+
+        # Claim Generation Job
+        status, job, message = self.__generation_jobs_repository.claim_job(
+            event_id=event_id, registration_id=registration_id, request_id=request_id, lease_seconds=JOB_LEASE_SECONDS
+        )
+        if status == HTTPStatus.CONFLICT:
+            logger.warning(message)
+            # A redelivery of the message that claimed a still-running job means that run crashed, e.g. out of
+            # memory. Leave the message for retry, so it takes the job over once the lease expires.
+            return not (
+                job
+                and request_id
+                and job.requestId == request_id
+                and job.jobStatus == GenerationJobStatus.RUNNING.value
+            )
+        if status != HTTPStatus.OK:
+            logger.error(message)
+            return False
 
         # Get Events Data
         status, event, message = self.__events_repository.query_events(event_id=event_id)
         if status != HTTPStatus.OK:
             logger.error(message)
-            return
-
-        template_img = event.certificateTemplate
+            self.__generation_jobs_repository.update_progress(job_entry=job, job_status=GenerationJobStatus.FAILED)
+            return True
 
         # Get Registration Data
         if registration_id:
@@ -49,77 +96,395 @@ class CertificateUsecase:
 
         if status != HTTPStatus.OK:
             logger.error(message)
-            return
+            self.__generation_jobs_repository.update_progress(job_entry=job, job_status=GenerationJobStatus.FAILED)
+            return True
 
-        html_filename = 'certificate.html'
+        progress = Counter()
+        job_status = GenerationJobStatus.COMPLETED
+        is_job_owner = True
+        memory_budget = MemoryBudget()
         try:
             with tempfile.TemporaryDirectory() as tmpdir:
-                template_img_path = os.path.join(tmpdir, 'template_img.png')
-                self.__s3_data_store.download_file(object_name=template_img, file_name=template_img_path)
-                zoom = 4
+                renderer, render_cache = self.__prepare_render(
+                    template_img=event.certificateTemplate, work_dir=tmpdir, template_dir=tmpdir
+                )
+                self.__generation_jobs_repository.update_progress(
+                    job_entry=job, total=len(registrations), lease_seconds=JOB_LEASE_SECONDS
+                )
 
-                for registration in registrations:
-                    logger.info(
-                        f"Generating certificates for event: {event_id} registration: {registration.registrationId}"
-                    )
+                # Fit every name up front so that each certificate renders in a single pass
+                self.__name_layout.fit_names(
+                    f'{registration.firstName} {registration.lastName}' for registration in registrations
+                )
 
-                    # Generate Certificate HTML--------------------------------------------------------------------------------------------
-                    name = f'{registration.firstName} {registration.lastName}'
-                    certificate_name = f'{event_id}_{name}'
-                    html_out = self.generate_certificate_html(template_img=template_img_path, name=name)
-                    output_path = os.path.join(tmpdir, html_filename)
-                    with open(output_path, 'w') as file:
-                        file.write(html_out)
-
-                    # Convert HTML to PDF-------------------------------------------------------------------------------------------------
-                    certificate_name_pdf = f'{certificate_name}.pdf'
-                    certificate_path = os.path.join(tmpdir, certificate_name_pdf)
-                    weasyprint.HTML(output_path).write_pdf(
-                        certificate_path, stylesheets=[CSS(string='@page { size: A4 landscape; margin: 0;}')]
-                    )
-
-                    # Get only the first page of the PDF----------------------------------------------------------------------------------
-                    certificate_doc = fitz.open(certificate_path)
-                    first_page = certificate_doc.load_page(0)
-
-                    # Create a new PDF to store the first page
-                    doc_first_page = fitz.open()
-                    doc_first_page.insert_pdf(certificate_doc, from_page=0, to_page=0)
-
-                    # Save the new PDF
-                    doc_first_page.save(certificate_path)
-                    doc_first_page.close()
-
-                    # Upload to S3-------------------------------------------------------------------------------------------------------
-                    certificate_pdf_object_key = f'certificates/{event_id}/{name}/{certificate_name_pdf}'
-                    self.__s3_data_store.upload_file(file_name=certificate_path, object_name=certificate_pdf_object_key)
-
-                    mat = fitz.Matrix(zoom, zoom)
-                    pix = first_page.get_pixmap(matrix=mat)
-
-                    # Save the image-----------------------------------------------------------------------------------------------------
-                    image_certificate_name = f'{certificate_name}.png'
-                    image_path = os.path.join(tmpdir, image_certificate_name)
-                    pix.save(image_path)
-
-                    # upload to S3-------------------------------------------------------------------------------------------------------
-                    certificate_img_object_key = f'certificates/{event_id}/{name}/{image_certificate_name}'
-                    self.__s3_data_store.upload_file(file_name=image_path, object_name=certificate_img_object_key)
-                    certificate_doc.close()
-
-                    # Update Registration Entry-------------------------------------------------------------------------------------------
-                    self.__registrations_repository.update_registration(
-                        registration_entry=registration,
-                        registration_in=RegistrationIn(
-                            certificateImgObjectKey=certificate_img_object_key,
-                            certificatePdfObjectKey=certificate_pdf_object_key,
+                # Event-wide runs also build contact sheets for review
+                contact_sheet = None
+                if not registration_id and CONTACT_SHEET_ENABLED:
+                    contact_sheet = ContactSheetBuilder(
+                        s3_data_store=self.__s3_data_store,
+                        object_prefix=(
+                            f'{CertificateConstants.CERTIFICATES_PREFIX}/{event_id}/{CertificateConstants.PREVIEWS_DIR}'
                         ),
+                        work_dir=tmpdir,
+                        template_img_path=renderer.template_img_path,
                     )
 
-                    logger.info(
-                        f"Success Generating certificates for event: {event_id} registration: {registration.registrationId}"
-                    )
+                # Render in chunks sized by the /tmp budget, each in a work directory that is cleared afterwards
+                processed = 0
+                while processed < len(registrations) and job_status != GenerationJobStatus.INTERRUPTED:
+                    chunk = registrations[processed : processed + memory_budget.chunk_size]
+                    with tempfile.TemporaryDirectory(dir=tmpdir) as chunk_dir:
+                        renderer.work_dir = chunk_dir
+                        for registration in chunk:
+                            if deadline and time.monotonic() >= deadline:
+                                logger.warning(
+                                    'Time budget exhausted after %s of %s certificates for event: %s',
+                                    processed,
+                                    len(registrations),
+                                    event_id,
+                                )
+                                job_status = GenerationJobStatus.INTERRUPTED
+                                break
+
+                            try:
+                                _, _, is_cached = self.__generate_certificate(
+                                    event_id=event_id,
+                                    registration=registration,
+                                    renderer=renderer,
+                                    render_cache=render_cache,
+                                    contact_sheet=contact_sheet,
+                                )
+                                progress['skipped' if is_cached else 'rendered'] += 1
+                            except Exception as e:
+                                progress['failed'] += 1
+                                log_summary.count('failed')
+                                logger.error('Error Generating Certificate: %s - %s', registration.registrationId, e)
+
+                            processed += 1
+                            if processed % JOB_PROGRESS_INTERVAL == 0:
+                                # Every progress update also renews the lease, so a live run keeps its job
+                                status, _, _ = self.__generation_jobs_repository.update_progress(
+                                    job_entry=job, lease_seconds=JOB_LEASE_SECONDS, **progress
+                                )
+                                progress.clear()
+                                if status == HTTPStatus.CONFLICT:
+                                    is_job_owner = False
+                                    job_status = GenerationJobStatus.INTERRUPTED
+                                    break
+
+                            # The retry skips the certificates rendered so far through the render cache
+                            if not memory_budget.within_budget():
+                                logger.warning(
+                                    'Memory budget exceeded after %s of %s certificates for event: %s',
+                                    processed,
+                                    len(registrations),
+                                    event_id,
+                                )
+                                job_status = GenerationJobStatus.INTERRUPTED
+                                break
+
+                    memory_budget.next_chunk_size()
+
+                if contact_sheet and job_status != GenerationJobStatus.INTERRUPTED:
+                    contact_sheet.finish()
 
         except Exception as e:
-            logger.error(f'Error Generating Certificate: {e}')
+            job_status = GenerationJobStatus.FAILED
+            log_summary.count('failed')
+            logger.error('Error Generating Certificate: %s', e)
+
+        memory_budget.report()
+        if not is_job_owner:
+            logger.warning('Stopped generating certificates for event: %s, its job was taken over', event_id)
+            return True
+
+        self.__generation_jobs_repository.update_progress(job_entry=job, job_status=job_status, **progress)
+        return job_status != GenerationJobStatus.INTERRUPTED
+
+    def get_generation_jobs(self, event_id: str) -> Tuple[HTTPStatus, List[GenerationJobOut], str]:
+        """
+        Get the progress of an event's certificate generation jobs.
+
+        Args:
+            event_id (str): The event ID.
+
+        Returns:
+            Tuple[HTTPStatus, List[GenerationJobOut], str]: A tuple containing HTTP status, the job progress records,
+            and an optional error message.
+        """
+        status, jobs, message = self.__generation_jobs_repository.query_jobs(event_id=event_id)
+        if status != HTTPStatus.OK:
+            return status, None, message
+
+        now = datetime.utcnow()
+        jobs_out = []
+        for job in jobs:
+            started_at = datetime.fromisoformat(job.startDate) if job.startDate else None
+            ended_at = datetime.fromisoformat(job.endDate) if job.endDate else now
+            elapsed = (ended_at - started_at).total_seconds() if started_at else 0
+            processed = job.renderedCount + job.failedCount + job.skippedCount
+            jobs_out.append(
+                GenerationJobOut(
+                    jobId=job.entryId,
+                    throughput=processed / elapsed if elapsed > 0 else None,
+                    **job.attribute_values,
+                )
+            )
+
+        return HTTPStatus.OK, jobs_out, None
+
+    def get_certificate(self, event_id: str, registration_id: str) -> Tuple[HTTPStatus, CertificateOut, str]:
+        """
+        Get pre-signed URLs of a registration's certificate, rendering it inline if it does not exist yet.
+
+        Args:
+            event_id (str): The event ID.
+            registration_id (str): The registration ID.
+
+        Returns:
+            Tuple[HTTPStatus, CertificateOut, str]: A tuple containing HTTP status, the certificate URLs,
+            and an optional error message.
+        """
+        status, registration, message = self.__registrations_repository.query_registrations(
+            event_id=event_id, registration_id=registration_id
+        )
+        if status != HTTPStatus.OK:
+            return status, None, message
+
+        object_keys = (registration.certificatePdfObjectKey, registration.certificateImgObjectKey)
+        if not all(object_keys) or not self.__s3_data_store.get_file_metadata(object_key=object_keys[0]):
+            status, event, message = self.__events_repository.query_events(event_id=event_id)
+            if status != HTTPStatus.OK:
+                return status, None, message
+            if not event.certificateTemplate:
+                return HTTPStatus.NOT_FOUND, None, f'Event with ID={event_id} has no certificate template'
+
+            try:
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    # The template survives in /tmp, so warm containers skip its download
+                    renderer, render_cache = self.__prepare_render(
+                        template_img=event.certificateTemplate, work_dir=tmpdir, template_dir=TEMPLATE_CACHE_DIR
+                    )
+                    pdf_object_key, img_object_key, _ = self.__generate_certificate(
+                        event_id=event_id, registration=registration, renderer=renderer, render_cache=render_cache
+                    )
+                    object_keys = (pdf_object_key, img_object_key)
+
+            except Exception as e:
+                message = f'Error Generating Certificate: {e}'
+                logger.error(message)
+                return HTTPStatus.INTERNAL_SERVER_ERROR, None, message
+
+        certificate_pdf_object_key, certificate_img_object_key = object_keys
+        try:
+            urls = self.__s3_data_store.generate_presigned_urls(object_names=list(object_keys))
+        except PdfServiceInternalError as e:
+            return e.status_code, None, e.message
+
+        certificate_out = CertificateOut(
+            eventId=event_id,
+            registrationId=registration_id,
+            certificatePdfObjectKey=certificate_pdf_object_key,
+            certificateImgObjectKey=certificate_img_object_key,
+            certificatePdfUrl=urls[certificate_pdf_object_key],
+            certificateImgUrl=urls[certificate_img_object_key],
+        )
+        return HTTPStatus.OK, certificate_out, None
+
+    def get_certificates(self, event_id: str) -> Tuple[HTTPStatus, List[CertificateOut], str]:
+        """
+        Get pre-signed URLs of every generated certificate of an event, signed in one bulk call.
+
+        Args:
+            event_id (str): The event ID.
+
+        Returns:
+            Tuple[HTTPStatus, List[CertificateOut], str]: A tuple containing HTTP status, the certificate URLs,
+            and an optional error message.
+        """
+        status, registrations, message = self.__registrations_repository.query_registrations(event_id=event_id)
+        if status != HTTPStatus.OK:
+            return status, None, message
+
+        registrations = [registration for registration in registrations if registration.certificatePdfObjectKey]
+        object_names = [
+            object_key
+            for registration in registrations
+            for object_key in (registration.certificatePdfObjectKey, registration.certificateImgObjectKey)
+        ]
+        try:
+            urls = self.__s3_data_store.generate_presigned_urls(object_names=object_names)
+        except PdfServiceInternalError as e:
+            return e.status_code, None, e.message
+
+        certificates_out = [
+            CertificateOut(
+                eventId=event_id,
+                registrationId=registration.registrationId,
+                certificatePdfObjectKey=registration.certificatePdfObjectKey,
+                certificateImgObjectKey=registration.certificateImgObjectKey,
+                certificatePdfUrl=urls.get(registration.certificatePdfObjectKey),
+                certificateImgUrl=urls.get(registration.certificateImgObjectKey),
+            )
+            for registration in registrations
+        ]
+        return HTTPStatus.OK, certificates_out, None
+
+    def __prepare_render(
+        self, template_img: str, work_dir: str, template_dir: str
+    ) -> Tuple[CertificateRenderer, RenderCache]:
+        template_metadata = self.__s3_data_store.get_file_metadata(object_key=template_img) or {}
+        template_etag = template_metadata.get('ETag')
+
+        if template_etag:
+            template_id = hashlib.sha256(f'{template_img}:{template_etag}'.encode('utf-8')).hexdigest()
+            template_img_path = os.path.join(template_dir, f'{template_id}.png')
+        else:
+            template_img_path = os.path.join(work_dir, CertificateConstants.TEMPLATE_IMG_FILENAME)
+
+        if not template_etag or not os.path.exists(template_img_path):
+            os.makedirs(template_dir, exist_ok=True)
+            self.__s3_data_store.download_file(object_name=template_img, file_name=template_img_path)
+
+        renderer = CertificateRenderer(template_img_path=template_img_path, work_dir=work_dir)
+        render_cache = RenderCache(
+            s3_data_store=self.__s3_data_store,
+            template_etag=template_etag,
+            settings_fingerprint=renderer.settings_fingerprint,
+        )
+        return renderer, render_cache
+
+    def __generate_certificate(
+        self,
+        event_id: str,
+        registration: Registration,
+        renderer: CertificateRenderer,
+        render_cache: RenderCache,
+        contact_sheet: ContactSheetBuilder = None,
+    ) -> Tuple[str, str, bool]:
+        logger.debug('Generating certificates for event: %s registration: %s', event_id, registration.registrationId)
+
+        name = f'{registration.firstName} {registration.lastName}'
+        certificate_pdf_object_key, certificate_img_object_key = self.__key_layout.object_keys(
+            event_id=event_id, registration=registration
+        )
+
+        # Reuse an identical certificate if one was already rendered-------------------------------------------------
+        font_size = self.__name_layout.font_size(name)
+        digest = render_cache.digest(fields={'name': name, 'fontSize': font_size})
+        is_cached = render_cache.resolve(
+            digest=digest,
+            pdf_key=certificate_pdf_object_key,
+            img_key=certificate_img_object_key,
+            candidates=[(registration.certificatePdfObjectKey, registration.certificateImgObjectKey)],
+        )
+
+        thumbnail = None
+        if not is_cached:
+            # Render Certificate------------------------------------------------------------------------------------
+            certificate_path, image_path, thumbnail = renderer.render(
+                name=name,
+                certificate_name=registration.registrationId,
+                font_size=font_size,
+                thumbnail_width=contact_sheet.cell_width if contact_sheet else None,
+            )
+
+            # Upload to S3-----------------------------------------------------------------------------------------
+            metadata = render_cache.metadata(digest) if render_cache.enabled else None
+            self.__s3_data_store.upload_file(
+                file_name=certificate_path, object_name=certificate_pdf_object_key, metadata=metadata
+            )
+            self.__s3_data_store.upload_file(
+                file_name=image_path, object_name=certificate_img_object_key, metadata=metadata
+            )
+            render_cache.remember(digest, certificate_pdf_object_key, certificate_img_object_key)
+
+        # Update Registration Entry-----------------------------------------------------------------------------------
+        status, _, message = self.__registrations_repository.update_registration(
+            registration_entry=registration,
+            registration_in=RegistrationIn(
+                certificateImgObjectKey=certificate_img_object_key,
+                certificatePdfObjectKey=certificate_pdf_object_key,
+            ),
+        )
+        if status != HTTPStatus.OK:
+            # The certificate is uploaded but unreachable from the registration, so it counts as failed
+            raise PdfServiceInternalError(status_code=status, message=message)
+
+        if contact_sheet:
+            contact_sheet.add(
+                registration_id=registration.registrationId, name=name, thumbnail=thumbnail, font_size=font_size
+            )
+
+        log_summary.count('cached' if is_cached else 'rendered')
+        logger.info(
+            'Success Generating certificates for event: %s registration: %s',
+            event_id,
+            registration.registrationId,
+            extra=SAMPLED,
+        )
+        return certificate_pdf_object_key, certificate_img_object_key, is_cached
+
+    def migrate_certificate_keys(self, event_id: str, delete_source: bool = False):
+        """
+        Move an event's rendered certificates to the configured key layout.
+
+        Objects are copied server-side and the registration keys are rewritten in bulk transactions.
+
+        Args:
+            event_id (str): The event whose certificates are migrated.
+            delete_source (bool, optional): Whether the objects under the old keys are deleted after the copy.
+        """
+        logger.info('Migrating certificate keys for event: %s', event_id)
+
+        status, registrations, message = self.__registrations_repository.query_registrations(event_id=event_id)
+        if status != HTTPStatus.OK:
+            logger.error(message)
+            return
+
+        bucket_name = self.__s3_data_store.bucket_name
+        updates = []
+        for registration in registrations:
+            source_keys = (registration.certificatePdfObjectKey, registration.certificateImgObjectKey)
+            target_keys = self.__key_layout.object_keys(event_id=event_id, registration=registration)
+            if not all(source_keys) or source_keys == target_keys:
+                continue
+
+            copied = all(
+                self.__s3_data_store.copy_object(src_bucket=bucket_name, src_key=src_key, target_key=target_key)
+                for src_key, target_key in zip(source_keys, target_keys)
+            )
+            if not copied:
+                logger.error('Failed to migrate certificates of registration: %s', registration.registrationId)
+                continue
+
+            updates.append(
+                (
+                    registration,
+                    RegistrationIn(certificatePdfObjectKey=target_keys[0], certificateImgObjectKey=target_keys[1]),
+                )
+            )
+
+        status, message = self.__registrations_repository.update_registrations(updates=updates)
+        if status != HTTPStatus.OK:
+            logger.error(message)
             return
+
+        if delete_source:
+            # Legacy keys can be shared by attendees with the same name, so keep keys still in use
+            migrated_ids = {registration.registrationId for registration, _ in updates}
+            keys_in_use = {
+                object_key
+                for registration in registrations
+                if registration.registrationId not in migrated_ids
+                for object_key in (registration.certificatePdfObjectKey, registration.certificateImgObjectKey)
+            }
+            source_keys = {
+                object_key
+                for registration, _ in updates
+                for object_key in (registration.certificatePdfObjectKey, registration.certificateImgObjectKey)
+            }
+            for object_key in source_keys - keys_in_use:
+                self.__s3_data_store.delete_file(object_name=object_key)
+
+        logger.info('Migrated %s certificates for event: %s', len(updates), event_id)
@@ -0,0 +1,162 @@
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from constants.certificate_constants import CertificateConstants
+from s3.data_store import S3DataStore
+from template.get_template import NAME_FONT_PATH
+from utils.logger import logger
+
+
+class ContactSheetBuilder:
+    """
+    Builds paginated contact sheets, i.e. downscaled grids of an event's certificates, for quick review.
+
+    Cells come from the thumbnails produced while rendering. For certificates that were not rendered in this run,
+    e.g. render cache hits, cells are drawn from the template image with the name overlaid. Each full page is
+    composed in one NumPy pass and uploaded right away, so at most one page of cells is held in memory.
+
+    Attributes:
+        object_prefix (str): The S3 prefix the sheets and their manifest are uploaded under.
+        columns (int): The number of cells per row.
+        rows (int): The number of rows per sheet.
+        cell_width (int): The width of a cell in pixels.
+    """
+
+    def __init__(
+        self,
+        s3_data_store: S3DataStore,
+        object_prefix: str,
+        work_dir: str,
+        template_img_path: str,
+        columns: int = CertificateConstants.CONTACT_SHEET_COLUMNS,
+        rows: int = CertificateConstants.CONTACT_SHEET_ROWS,
+        cell_width: int = CertificateConstants.CONTACT_SHEET_CELL_WIDTH,
+    ):
+        self.object_prefix = object_prefix
+        self.columns = columns
+        self.rows = rows
+        self.cell_width = cell_width
+        self.__s3_data_store = s3_data_store
+        self.__work_dir = work_dir
+        self.__template_img_path = template_img_path
+        self.__cell_size: Optional[Tuple[int, int]] = None
+        self.__template_cell: Optional[Image.Image] = None
+        self.__fonts: Dict[int, ImageFont.ImageFont] = {}
+        self.__cells: List[np.ndarray] = []
+        self.__page_entries: List[dict] = []
+        self.__manifest: List[dict] = []
+
+    def add(
+        self,
+        registration_id: str,
+        name: str,
+        thumbnail: np.ndarray = None,
+        font_size: int = CertificateConstants.NAME_FONT_SIZE,
+    ) -> None:
+        """
+        Add a certificate to the contact sheets.
+
+        Args:
+            registration_id (str): The registration ID of the certificate.
+            name (str): The name printed on the certificate.
+            thumbnail (np.ndarray, optional): A reduced-resolution RGB raster of the rendered certificate
+                (default is None to draw the cell from the template).
+            font_size (int, optional): The font size the name was rendered at, used for cells drawn from the template.
+        """
+        if self.__cell_size is None:
+            self.__cell_size = (
+                (thumbnail.shape[1], thumbnail.shape[0])
+                if thumbnail is not None
+                else (self.cell_width, round(self.cell_width * CertificateConstants.PAGE_ASPECT_RATIO))
+            )
+
+        if thumbnail is None:
+            cell = self.__overlay_cell(name=name, font_size=font_size)
+        elif (thumbnail.shape[1], thumbnail.shape[0]) != self.__cell_size or thumbnail.shape[2] != 3:
+            cell = np.asarray(Image.fromarray(thumbnail).convert('RGB').resize(self.__cell_size))
+        else:
+            cell = thumbnail
+
+        self.__cells.append(cell)
+        self.__page_entries.append({'registrationId': registration_id, 'name': name})
+        if len(self.__cells) == self.columns * self.rows:
+            self.__flush_page()
+
+    def finish(self) -> List[str]:
+        """
+        Upload the last partial sheet and the manifest of all sheets.
+
+        Returns:
+            List[str]: The object keys of the uploaded sheets.
+        """
+        if self.__cells:
+            self.__flush_page()
+        if not self.__manifest:
+            return []
+
+        manifest_path = os.path.join(self.__work_dir, 'contact-sheet-manifest.json')
+        with open(manifest_path, 'w') as file:
+            json.dump({'pages': self.__manifest}, file)
+        self.__s3_data_store.upload_file(file_name=manifest_path, object_name=f'{self.object_prefix}/manifest.json')
+
+        object_keys = [page['objectKey'] for page in self.__manifest]
+        logger.info('Uploaded %s contact sheets to %s', len(object_keys), self.object_prefix)
+        return object_keys
+
+    def __flush_page(self) -> None:
+        width, height = self.__cell_size
+        gutter = CertificateConstants.CONTACT_SHEET_GUTTER
+        rows = math.ceil(len(self.__cells) / self.columns)
+
+        # Stack every cell, pad to a full grid and add gutters in one pass, then fold the stack into a single image
+        cells = np.stack(self.__cells)
+        blank_count = rows * self.columns - len(cells)
+        if blank_count:
+            blanks = np.full((blank_count, height, width, 3), 255, dtype=np.uint8)
+            cells = np.concatenate([cells, blanks])
+        cells = np.pad(cells, ((0, 0), (gutter, gutter), (gutter, gutter), (0, 0)), constant_values=255)
+        cell_height, cell_width = cells.shape[1:3]
+        sheet = (
+            cells.reshape(rows, self.columns, cell_height, cell_width, 3)
+            .transpose(0, 2, 1, 3, 4)
+            .reshape(rows * cell_height, self.columns * cell_width, 3)
+        )
+
+        page_number = len(self.__manifest) + 1
+        sheet_name = f'contact-sheet-{page_number:03d}.jpg'
+        sheet_path = os.path.join(self.__work_dir, sheet_name)
+        Image.fromarray(sheet).save(sheet_path, 'JPEG', quality=80, optimize=True)
+
+        object_key = f'{self.object_prefix}/{sheet_name}'
+        self.__s3_data_store.upload_file(file_name=sheet_path, object_name=object_key)
+        os.remove(sheet_path)
+
+        self.__manifest.append({'page': page_number, 'objectKey': object_key, 'certificates': self.__page_entries})
+        self.__cells = []
+        self.__page_entries = []
+
+    def __overlay_cell(self, name: str, font_size: int) -> np.ndarray:
+        if self.__template_cell is None:
+            with Image.open(self.__template_img_path) as template_img:
+                self.__template_cell = template_img.convert('RGB').resize(self.__cell_size)
+
+        cell_font_size = max(1, round(font_size * self.__cell_size[0] / CertificateConstants.PAGE_WIDTH_PX))
+        font = self.__fonts.get(cell_font_size)
+        if font is None:
+            try:
+                font = ImageFont.truetype(NAME_FONT_PATH, cell_font_size)
+            except OSError:
+                font = ImageFont.load_default()
+            self.__fonts[cell_font_size] = font
+
+        cell = self.__template_cell.copy()
+        draw = ImageDraw.Draw(cell)
+        left, top, right, bottom = draw.textbbox((0, 0), name, font=font)
+        position = ((self.__cell_size[0] - right - left) / 2, (self.__cell_size[1] - bottom - top) / 2)
+        draw.text(position, name, fill=(0, 0, 0), font=font)
+        return np.asarray(cell)
@@ -0,0 +1,92 @@
+import math
+from typing import Dict, Iterable
+
+from PIL import ImageFont
+
+from constants.certificate_constants import CertificateConstants
+from template.get_template import NAME_FONT_PATH
+from utils.logger import logger
+
+# Per-container glyph advance tables keyed by font path, in ems
+GLYPH_ADVANCE_CACHE: Dict[str, Dict[str, float]] = {}
+
+
+class NameLayout:
+    """
+    Fits attendee names to the certificate width from cached glyph metrics, without trial renders.
+
+    The font is loaded once and each glyph's advance is measured once per container. A name's width is the sum of its
+    glyph advances, from which the largest font size that fits is computed directly. Kerning is ignored, which the
+    width margin absorbs.
+
+    Attributes:
+        font_path (str): The TrueType font the name is measured with. Defaults to the template's name font.
+        max_font_size (int): The font size of names that fit without shrinking.
+        min_font_size (int): The smallest font size a long name is shrunk to.
+        max_width (float): The widest a name may render, in CSS pixels.
+    """
+
+    def __init__(
+        self,
+        font_path: str = NAME_FONT_PATH,
+        max_font_size: int = CertificateConstants.NAME_FONT_SIZE,
+        min_font_size: int = CertificateConstants.NAME_MIN_FONT_SIZE,
+        max_width: float = CertificateConstants.PAGE_WIDTH_PX * CertificateConstants.NAME_MAX_WIDTH_RATIO,
+    ):
+        self.font_path = font_path
+        self.max_font_size = max_font_size
+        self.min_font_size = min_font_size
+        self.max_width = max_width
+        self.__font = None
+        self.__advances = GLYPH_ADVANCE_CACHE.setdefault(self.font_path, {})
+        self.__font_sizes: Dict[str, int] = {}
+
+    def fit_names(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Compute the fitted font size of every name in one pass.
+
+        Args:
+            names (Iterable[str]): The names printed on the certificates.
+
+        Returns:
+            Dict[str, int]: The font size in CSS pixels of each name.
+        """
+        font_sizes = {name: self.font_size(name) for name in names}
+        shrunk_count = sum(1 for font_size in font_sizes.values() if font_size < self.max_font_size)
+        logger.info('Fitted %s names, %s shrunk below %spx', len(font_sizes), shrunk_count, self.max_font_size)
+        return font_sizes
+
+    def font_size(self, name: str) -> int:
+        """Get the largest font size, in whole CSS pixels, at which the name fits within the maximum width."""
+        font_size = self.__font_sizes.get(name)
+        if font_size is None:
+            width_em = sum(self.__advance(glyph) for glyph in name)
+            font_size = self.max_font_size
+            if width_em * self.max_font_size > self.max_width:
+                font_size = max(self.min_font_size, math.floor(self.max_width / width_em))
+            self.__font_sizes[name] = font_size
+
+        return font_size
+
+    def __advance(self, glyph: str) -> float:
+        advance = self.__advances.get(glyph)
+        if advance is None:
+            font = self.__load_font()
+            if font is None:
+                advance = CertificateConstants.NAME_FALLBACK_ADVANCE_EM
+            else:
+                advance = font.getlength(glyph) / font.size
+            self.__advances[glyph] = advance
+
+        return advance
+
+    def __load_font(self):
+        if self.__font is None:
+            try:
+                # A large size keeps the rounding of the hinted advances negligible
+                self.__font = ImageFont.truetype(self.font_path, CertificateConstants.NAME_FONT_SIZE * 10)
+            except OSError:
+                logger.warning('Font %s not found, estimating name widths', self.font_path)
+                self.__font = False
+
+        return self.__font or None
@@ -0,0 +1,93 @@
+import hashlib
+import json
+from typing import Dict, Iterable, Tuple
+
+from constants.certificate_constants import CertificateConstants
+from s3.data_store import S3DataStore
+from utils.logger import logger
+
+
+class RenderCache:
+    """
+    A content-addressed cache of rendered certificates.
+
+    Certificates are keyed by a digest of the template ETag, the rendered fields and the render settings. Uploaded
+    certificates carry the digest as S3 object metadata. A later render with the same digest can then reuse the
+    stored objects, either in the same run or in a later one. When the stored objects sit under different keys,
+    they are copied server-side.
+    """
+
+    def __init__(self, s3_data_store: S3DataStore, template_etag: str, settings_fingerprint: str):
+        self.__s3_data_store = s3_data_store
+        self.__template_etag = template_etag
+        self.__settings_fingerprint = settings_fingerprint
+        self.__rendered: Dict[str, Tuple[str, str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.__template_etag)
+
+    def digest(self, fields: dict) -> str:
+        payload = json.dumps(
+            {'template': self.__template_etag, 'fields': fields, 'settings': self.__settings_fingerprint},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def metadata(self, digest: str) -> Dict[str, str]:
+        """The S3 object metadata that marks an upload with its render digest."""
+        return {CertificateConstants.RENDER_DIGEST_METADATA_KEY: digest}
+
+    def remember(self, digest: str, pdf_key: str, img_key: str) -> None:
+        self.__rendered[digest] = (pdf_key, img_key)
+
+    def resolve(self, digest: str, pdf_key: str, img_key: str, candidates: Iterable[Tuple[str, str]] = ()) -> bool:
+        """
+        Make the certificate with the given digest available at the target keys without rendering it.
+
+        Args:
+            digest (str): The render digest of the certificate.
+            pdf_key (str): The target PDF object key.
+            img_key (str): The target PNG object key.
+            candidates (Iterable[Tuple[str, str]], optional): Other (PDF, PNG) key pairs that may already hold
+                this certificate, e.g. the keys stored on the registration by an earlier run.
+
+        Returns:
+            bool: True if the target keys now hold the certificate, False if it still has to be rendered.
+        """
+        if not self.enabled:
+            return False
+
+        target = (pdf_key, img_key)
+        sources = [self.__rendered[digest]] if digest in self.__rendered else []
+        sources.extend(source for source in (target, *candidates) if all(source) and source not in sources)
+
+        for source in sources:
+            is_known = source == self.__rendered.get(digest)
+            if not is_known and not self.__is_rendered(digest, *source):
+                continue
+            if source != target and not self.__copy(source, target):
+                continue
+
+            logger.debug('Render cache hit for %s', pdf_key)
+            self.remember(digest, pdf_key, img_key)
+            return True
+
+        return False
+
+    def __copy(self, source: Tuple[str, str], target: Tuple[str, str]) -> bool:
+        bucket_name = self.__s3_data_store.bucket_name
+        return all(
+            self.__s3_data_store.copy_object(src_bucket=bucket_name, src_key=src_key, target_key=target_key)
+            for src_key, target_key in zip(source, target)
+        )
+
+    def __is_rendered(self, digest: str, pdf_key: str, img_key: str) -> bool:
+        for object_key in (pdf_key, img_key):
+            file_metadata = self.__s3_data_store.get_file_metadata(object_key=object_key)
+            if not file_metadata:
+                return False
+            if file_metadata['Metadata'].get(CertificateConstants.RENDER_DIGEST_METADATA_KEY) != digest:
+                return False
+
+        return True
@@ -1,7 +1,82 @@
+import atexit
 import logging
 import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
 from sys import stdout
 
+# Pass as `extra` on high-volume success lines so that they are subject to LOG_SAMPLE_RATE
+SAMPLED = {'sampled': True}
+
+LOG_MODE_ASYNC = 'async'
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records marked as sampled. Warnings and errors are always kept."""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, 'sampled', False):
+            log_summary.count(record.levelname.lower())
+            return True
+
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            log_summary.count(record.levelname.lower())
+            return True
+
+        log_summary.count('sampled_out')
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is so that message formatting happens on the writer thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class InvocationLogSummary:
+    """Counts log records and certificate outcomes of one invocation, reported as a single summary line."""
+
+    def __init__(self):
+        self.__counter = Counter()
+        self.__lock = threading.Lock()
+        self.__started_at = time.monotonic()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self.__lock:
+            self.__counter[key] += value
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__counter.clear()
+            self.__started_at = time.monotonic()
+
+    def emit(self) -> None:
+        """Log the summary of the current invocation and start a new one."""
+        with self.__lock:
+            counts = ' '.join(f'{key}={value}' for key, value in sorted(self.__counter.items()))
+            elapsed = time.monotonic() - self.__started_at
+
+        logger.info('Invocation summary: elapsed=%.2fs %s', elapsed, counts)
+        self.reset()
+
+
+def flush_logs() -> None:
+    """Block until the background writer has written every queued record."""
+    if LOG_QUEUE is not None:
+        LOG_QUEUE.join()
+
+
+log_summary = InvocationLogSummary()
+
 logger = logging.getLogger('sparcs-certificate-service')
 handler = logging.StreamHandler(stdout)
 if os.getenv('AWS_EXECUTION_ENV'):  # pragma: no cover
@@ -10,5 +85,15 @@ if os.getenv('AWS_EXECUTION_ENV'):  # pragma: no cover
 else:
     log_formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(message)s')
 handler.setFormatter(log_formatter)
-logger.addHandler(handler)
-logger.setLevel(os.getenv('LOG_LEVEL', logging.getLevelName(logging.DEBUG)))
+logger.addFilter(SamplingFilter(sample_rate=float(os.getenv('LOG_SAMPLE_RATE', '1'))))
+logger.setLevel(os.getenv('LOG_LEVEL', logging.getLevelName(logging.INFO)))
+
+if os.getenv('LOG_MODE') == LOG_MODE_ASYNC:
+    LOG_QUEUE = queue.Queue()
+    logger.addHandler(DeferredQueueHandler(LOG_QUEUE))
+    log_listener = QueueListener(LOG_QUEUE, handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+else:
+    LOG_QUEUE = None
+    logger.addHandler(handler)
@@ -0,0 +1,143 @@
+import gc
+import os
+import resource
+import shutil
+import tempfile
+import time
+from typing import Callable, Tuple
+
+import fitz
+
+from utils.logger import logger
+
+MB = 1024 * 1024
+
+
+class MemoryBudget:
+    """
+    Tracks process RSS and /tmp usage against a budget.
+
+    Certificates render one at a time, so the two budgets have different levers. RSS is held down by releasing
+    unreachable objects and MuPDF's resource store when it nears the memory budget, at most once per release interval.
+    Freed memory is rarely returned to the OS, so when RSS is still over the budget after a release, the run has to
+    end before it runs out of memory. The chunk size only bounds how many rendered files pile up in /tmp before their
+    work directory is cleared: chunks shrink when /tmp usage nears its budget and grow back while it stays well below
+    it. The chunk size does not change the RSS of a render.
+
+    The memory budget defaults to 80% of the Lambda memory size and the /tmp budget to 80% of the /tmp volume.
+
+    Attributes:
+        memory_budget_mb (float): The RSS budget in MB.
+        tmp_budget_mb (float): The /tmp usage budget in MB.
+        chunk_size (int): The number of certificates rendered into a work directory before it is cleared.
+        max_chunk_size (int): The largest chunk size the budget may grow to.
+        release_interval_seconds (float): The shortest time between two releases of cached memory.
+        rss_high_water_mb (float): The highest RSS seen in MB.
+        tmp_high_water_mb (float): The highest /tmp usage seen in MB.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: float = None,
+        tmp_budget_mb: float = None,
+        max_chunk_size: int = 64,
+        release_interval_seconds: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.__tmp_dir = tempfile.gettempdir()
+        self.memory_budget_mb = memory_budget_mb or float(
+            os.getenv('MEMORY_BUDGET_MB') or 0.8 * int(os.getenv('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '3008'))
+        )
+        self.tmp_budget_mb = tmp_budget_mb or float(
+            os.getenv('TMP_BUDGET_MB') or 0.8 * shutil.disk_usage(self.__tmp_dir).total / MB
+        )
+        self.max_chunk_size = max_chunk_size
+        self.chunk_size = max(1, max_chunk_size // 4)
+        self.release_interval_seconds = release_interval_seconds
+        self.__clock = clock
+        self.__released_at = None
+        self.rss_high_water_mb = 0.0
+        self.tmp_high_water_mb = 0.0
+
+    def rss_mb(self) -> float:
+        try:
+            with open('/proc/self/statm') as statm:
+                resident_pages = int(statm.read().split()[1])
+            return resident_pages * resource.getpagesize() / MB
+        except (OSError, IndexError, ValueError):
+            # ru_maxrss is the peak in KB on Linux, the closest fallback without procfs
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def tmp_mb(self) -> float:
+        return shutil.disk_usage(self.__tmp_dir).used / MB
+
+    def record(self) -> Tuple[float, float]:
+        """
+        Sample RSS and /tmp usage and update the high-water marks.
+
+        Returns:
+            Tuple[float, float]: The usage ratios of the memory budget and of the /tmp budget.
+        """
+        rss = self.rss_mb()
+        tmp = self.tmp_mb()
+        self.rss_high_water_mb = max(self.rss_high_water_mb, rss)
+        self.tmp_high_water_mb = max(self.tmp_high_water_mb, tmp)
+        return rss / self.memory_budget_mb, tmp / self.tmp_budget_mb
+
+    def within_budget(self) -> bool:
+        """
+        Sample usage, and release cached memory if RSS nears the memory budget and a release is due.
+
+        Returns:
+            bool: False if RSS is over the memory budget even though cached memory was released, i.e. the run should
+            end before it runs out of memory.
+        """
+        memory_usage, _ = self.record()
+        if memory_usage >= 0.9 and self.__is_release_due():
+            self.release()
+            memory_usage, _ = self.record()
+
+        return memory_usage < 1.0
+
+    def next_chunk_size(self) -> int:
+        """
+        Release cached memory when RSS is high, and resize the next chunk from the /tmp usage.
+
+        Returns:
+            int: The number of certificates to render in the next chunk.
+        """
+        memory_usage, tmp_usage = self.record()
+        if memory_usage >= 0.75 and self.__is_release_due():
+            self.release()
+            memory_usage, tmp_usage = self.record()
+
+        if tmp_usage >= 0.9:
+            self.chunk_size = max(1, self.chunk_size // 2)
+        elif tmp_usage < 0.5:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+
+        logger.debug(
+            'Usage at %.0f%% of memory and %.0f%% of /tmp budget, next chunk size: %s',
+            memory_usage * 100,
+            tmp_usage * 100,
+            self.chunk_size,
+        )
+        return self.chunk_size
+
+    def release(self) -> None:
+        """Drop unreachable objects and MuPDF's resource store."""
+        gc.collect()
+        fitz.TOOLS.store_shrink(100)
+        self.__released_at = self.__clock()
+
+    def __is_release_due(self) -> bool:
+        return self.__released_at is None or self.__clock() - self.__released_at >= self.release_interval_seconds
+
+    def report(self) -> None:
+        logger.info(
+            'Memory high-water marks: rss=%.0fMB/%.0fMB tmp=%.0fMB/%.0fMB',
+            self.rss_high_water_mb,
+            self.memory_budget_mb,
+            self.tmp_high_water_mb,
+            self.tmp_budget_mb,
+        )
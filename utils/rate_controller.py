@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, TypeVar
+
+from utils.logger import logger
+
+T = TypeVar('T')
+
+THROTTLE_ERROR_CODES = frozenset(
+    [
+        'ProvisionedThroughputExceeded',
+        'ProvisionedThroughputExceededException',
+        'RequestLimitExceeded',
+        'ThrottlingError',
+        'ThrottlingException',
+        'Throttling',
+        'TooManyRequestsException',
+        'SlowDown',
+        'RequestThrottled',
+    ]
+)
+METRIC_NAMESPACE = 'SparcsCertificateService'
+BURST_SECONDS = 1.0
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Check whether an error, or any error that caused it, is a DynamoDB or S3 throttling response."""
+    while error is not None:
+        # pynamodb errors
+        if getattr(error, 'cause_response_code', None) in THROTTLE_ERROR_CODES:
+            return True
+        for reason in getattr(error, 'cancellation_reasons', None) or []:
+            if reason is not None and reason.code in THROTTLE_ERROR_CODES:
+                return True
+
+        # botocore errors
+        response = getattr(error, 'response', None)
+        if isinstance(response, dict):
+            if response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+                return True
+            if response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 503:
+                return True
+
+        # boto3 transfer errors only keep the code in their message
+        if any(f'({code})' in str(error) for code in THROTTLE_ERROR_CODES):
+            return True
+
+        error = error.__cause__ or error.__context__
+
+    return False
+
+
+class AdaptiveRateController:
+    """
+    Paces calls to a throttled backend with a token bucket whose rate adapts by AIMD (additive increase,
+    multiplicative decrease).
+
+    Every call reserves the next slot of the current rate and waits for it, with up to a second of unused capacity
+    allowed as a burst. Every successful call raises the rate by ``increase / rate``, i.e. by about ``increase`` calls
+    per second for every second spent at full pace. Every throttling response halves the rate, drops the burst and is
+    retried after a jittered exponential backoff.
+    Under sustained bulk load the rate settles just below what the backend accepts, even when every call comes from
+    a single thread.
+
+    Attributes:
+        name (str): The name of the backend, used as the metric dimension.
+        min_rate (float): The lowest rate in calls per second.
+        max_rate (float): The highest rate in calls per second.
+        increase (float): The additive increase of the rate per second at full pace.
+        max_retries (int): How many times a throttled call is retried before its error is raised.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_rate: float = 50,
+        min_rate: float = 1,
+        max_rate: float = 1000,
+        increase: float = 10,
+        max_retries: int = 6,
+        base_delay: float = 0.05,
+        max_delay: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.max_retries = max_retries
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__rate = float(initial_rate)
+        self.__next_call_at = clock()
+        self.__successes = 0
+        self.__throttles = 0
+        self.__window_started_at = clock()
+        self.__lock = threading.Lock()
+
+    @property
+    def current_rate(self) -> float:
+        """The rate calls are currently paced at, in calls per second."""
+        return self.__rate
+
+    @property
+    def throughput(self) -> float:
+        """The successful calls per second since the last metric was emitted."""
+        elapsed = self.__clock() - self.__window_started_at
+        return self.__successes / elapsed if elapsed > 0 else 0.0
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Call a function at the current rate, retrying it while it is throttled.
+
+        Args:
+            func (Callable): The function that calls the backend.
+
+        Returns:
+            The result of the function.
+        """
+        attempt = 0
+        while True:
+            self.__acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    raise
+                self.__on_throttle()
+                if attempt >= self.max_retries:
+                    logger.error('[%s] Throttled after %s retries', self.name, attempt)
+                    raise
+            else:
+                self.__on_success()
+                return result
+
+            # Full jitter backoff keeps retries of parallel callers from arriving together
+            self.__sleep(random.uniform(0, min(self.__max_delay, self.__base_delay * 2**attempt)))
+            attempt += 1
+
+    def emit_metrics(self) -> None:
+        """Write the rate, throughput and throttle count as a CloudWatch embedded metric and reset the window."""
+        with self.__lock:
+            metrics = {
+                'RateLimit': round(self.__rate, 2),
+                'Throughput': round(self.throughput, 2),
+                'Throttles': self.__throttles,
+            }
+            self.__successes = 0
+            self.__throttles = 0
+            self.__window_started_at = self.__clock()
+
+        # Embedded metrics must be a bare JSON line, so they bypass the log formatter
+        print(
+            json.dumps(
+                {
+                    '_aws': {
+                        'Timestamp': int(time.time() * 1000),
+                        'CloudWatchMetrics': [
+                            {
+                                'Namespace': METRIC_NAMESPACE,
+                                'Dimensions': [['Backend']],
+                                'Metrics': [
+                                    {'Name': 'RateLimit', 'Unit': 'Count/Second'},
+                                    {'Name': 'Throughput', 'Unit': 'Count/Second'},
+                                    {'Name': 'Throttles', 'Unit': 'Count'},
+                                ],
+                            }
+                        ],
+                    },
+                    'Backend': self.name,
+                    **metrics,
+                }
+            ),
+            flush=True,
+        )
+
+    def __acquire(self) -> None:
+        with self.__lock:
+            now = self.__clock()
+            # Unused capacity accrues for at most one second, so an idle backend cannot be hit by a long burst
+            call_at = max(self.__next_call_at, now - BURST_SECONDS)
+            self.__next_call_at = call_at + 1 / self.__rate
+
+        if call_at > now:
+            self.__sleep(call_at - now)
+
+    def __on_success(self) -> None:
+        with self.__lock:
+            self.__successes += 1
+            self.__rate = min(self.max_rate, self.__rate + self.increase / self.__rate)
+
+    def __on_throttle(self) -> None:
+        with self.__lock:
+            self.__throttles += 1
+            self.__rate = max(self.min_rate, self.__rate / 2)
+            # Drop the accrued burst, so the next call waits for the halved rate
+            self.__next_call_at = max(self.__next_call_at, self.__clock())
+
+
+RATE_CONTROLLERS: Dict[str, AdaptiveRateController] = {}
+RATE_CONTROLLERS_LOCK = threading.Lock()
+
+
+def get_rate_controller(name: str) -> AdaptiveRateController:
+    """Get the container-wide rate controller of a backend, shared by every repository and data store."""
+    with RATE_CONTROLLERS_LOCK:
+        if name not in RATE_CONTROLLERS:
+            RATE_CONTROLLERS[name] = AdaptiveRateController(
+                name=name,
+                initial_rate=float(os.getenv('RATE_CONTROLLER_INITIAL_RATE', '50')),
+                max_rate=float(os.getenv('RATE_CONTROLLER_MAX_RATE', '1000')),
+            )
+        return RATE_CONTROLLERS[name]
+
+
+def emit_rate_metrics() -> None:
+    """Emit the metrics of every rate controller created in this container."""
+    for controller in list(RATE_CONTROLLERS.values()):
+        controller.emit_metrics()
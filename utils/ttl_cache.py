@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    A size-bounded, thread-safe cache whose entries expire after a time-to-live.
+
+    Entries are evicted in least-recently-used order once ``max_size`` is reached. The cache lives as long as
+    the Lambda container does, so module or class level instances are shared across warm invocations.
+
+    Attributes:
+        max_size (int): The maximum number of entries kept in the cache.
+        ttl (float): The default time-to-live of an entry in seconds.
+    """
+
+    __slots__ = ['max_size', 'ttl', '__entries', '__lock', '__clock']
+
+    def __init__(self, max_size: int = 128, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__clock = clock
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any, optional): The value returned when the key is missing or expired.
+
+        Returns:
+            Any: The cached value, or ``default``.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self.__clock():
+                del self.__entries[key]
+                return default
+
+            self.__entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+            ttl (float, optional): The time-to-live of this entry in seconds (default is the cache TTL).
+        """
+        if self.max_size <= 0:
+            return
+
+        expires_at = self.__clock() + (self.ttl if ttl is None else ttl)
+        with self.__lock:
+            self.__entries[key] = (expires_at, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key from the cache and return its value."""
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self.__lock:
+            self.__entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, default=_MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+_MISSING = object()